@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial Codec Benchmarks
+========================
+Updated: 2021-06
+
+Reproducible benchmark suite for the spatial codecs. Every case times one stage (stream encode,
+stream decode, round trip, batch encode/decode, construction or import) over seeded payloads at a
+fixed block size and bit density. Each case is calibrated to a minimum sample duration and
+repeated; the median and minimum time per call are reported.
+
+Results are written as json and can be compared against a stored baseline; the exit status is
+non zero if any case regressed beyond the threshold.
+
+```
+python benchmarks/bench.py -o results.json
+python benchmarks/bench.py -c baseline.json -t 0.2 -k n3/
+```
+
+Dependancies
+------------
+```
+import os
+import sys
+import json
+import getopt
+import platform
+import statistics
+import subprocess
+import numpy as np
+from time import perf_counter
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterator, Optional, Tuple
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import os
+import sys
+import json
+import getopt
+import platform
+import statistics
+import subprocess
+import numpy as np
+from time import perf_counter
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scodec import __version__  # noqa: E402
+from scodec.codec.n2 import N2  # noqa: E402
+from scodec.codec.n3 import N3  # noqa: E402
+from scodec.codec.base import SpatialCodec  # noqa: E402
+
+SEED = 2021
+REPEAT = 5
+MIN_TIME = 0.02  # minimum duration of a sample in seconds
+BLOCK_SIZES = {"n2": (64, 1024, 16384), "n3": (64, 512, 4096, 32768)}
+DENSITIES = (0.0, 0.01, 0.5, 1.0)
+BATCH_SIZES = (1, 64, 1024)
+BATCH_BLOCK_SIZE = 4096  # valid for every codec
+CODECS = {"n2": N2, "n3": N3}
+
+
+def payload(block_size: int, density: float, rng: np.random.Generator) -> bytes:
+    """
+    Seeded block with the given fraction of bits set.
+
+    :param block_size: block size in bits
+    :type block_size: int
+    :param density: fraction of bits set
+    :type density: float
+    :param rng: seeded random generator
+    :type rng: np.random.Generator
+    :return: block of (block_size + 7) // 8 bytes
+    :rtype: bytes
+    """
+    bits = np.zeros(block_size, dtype=np.uint8)
+    bits[rng.permutation(block_size)[:round(density * block_size)]] = 1
+    return np.packbits(bits)[:(block_size + 7) >> 3].tobytes()
+
+
+def measure(func: Callable[[], object]) -> Dict[str, float]:
+    """
+    Time func per call. The number of calls per sample is doubled until a sample lasts at least
+    MIN_TIME; REPEAT samples are then taken.
+
+    :param func: benchmarked callable
+    :type func: Callable[[],object]
+    :return: median and minimum seconds per call, calls per sample and samples
+    :rtype: Dict[str,float]
+    """
+    def sample(loops: int) -> float:
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        return perf_counter() - start
+
+    loops = 1
+    while sample(loops) < MIN_TIME:
+        loops <<= 1
+    times = [sample(loops) / loops for _ in range(REPEAT)]
+    return {"median": statistics.median(times), "min": min(times), "loops": loops,
+            "repeat": REPEAT}
+
+
+def measure_import(module: str) -> Dict[str, float]:
+    """
+    Time the import of a module in a fresh interpreter.
+
+    :param module: module name
+    :type module: str
+    :return: median and minimum seconds per import and samples
+    :rtype: Dict[str,float]
+    """
+    code = "from time import perf_counter as t; s = t(); import {}; print(t() - s)".format(module)
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    times = [
+        float(subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                             stdout=subprocess.PIPE).stdout)
+        for _ in range(REPEAT)
+    ]
+    return {"median": statistics.median(times), "min": min(times), "loops": 1, "repeat": REPEAT}
+
+
+@lru_cache(maxsize=None)
+def shared_codec(name: str, block_size: int) -> SpatialCodec:
+    """
+    Codec shared by every case of a codec and block size, built when first selected.
+
+    :param name: codec name
+    :type name: str
+    :param block_size: block size in bits
+    :type block_size: int
+    :return: spatial codec with its lookup tables built
+    :rtype: SpatialCodec
+    """
+    codec = CODECS[name](block_size)
+    codec.table, codec.inverse
+    return codec
+
+
+def measure_stream(name: str, block_size: int, density: float, stage: str) -> Dict[str, float]:
+    """
+    Time a stream stage of a single seeded block.
+
+    :param name: codec name
+    :type name: str
+    :param block_size: block size in bits
+    :type block_size: int
+    :param density: fraction of bits set
+    :type density: float
+    :param stage: "encode", "decode" or "roundtrip"
+    :type stage: str
+    :return: timings (see `measure`)
+    :rtype: Dict[str,float]
+    """
+    codec = shared_codec(name, block_size)
+    byte_size = (block_size + 7) >> 3
+    data = payload(block_size, density, np.random.default_rng(SEED))
+    if stage == "encode":
+        return measure(lambda: codec.stream_encode(data))
+    if stage == "decode":
+        stream = codec.stream_encode(data)
+        return measure(lambda: codec.stream_decode(stream, byte_size))
+    return measure(lambda: codec.stream_decode(codec.stream_encode(data), byte_size))
+
+
+def measure_batch(name: str, batch_size: int, stage: str) -> Dict[str, float]:
+    """
+    Time a batch stage of batch_size seeded blocks of BATCH_BLOCK_SIZE bits.
+
+    :param name: codec name
+    :type name: str
+    :param batch_size: blocks per batch
+    :type batch_size: int
+    :param stage: "encode_batch" or "decode_batch"
+    :type stage: str
+    :return: timings (see `measure`)
+    :rtype: Dict[str,float]
+    """
+    codec = shared_codec(name, BATCH_BLOCK_SIZE)
+    rng = np.random.default_rng(SEED)
+    payloads = np.frombuffer(
+        b"".join(payload(BATCH_BLOCK_SIZE, 0.5, rng) for _ in range(batch_size)),
+        dtype=np.uint8
+    ).reshape(batch_size, -1)
+    if stage == "encode_batch":
+        return measure(lambda: codec.encode_batch(payloads))
+    coors, offsets = codec.encode_batch(payloads)
+    return measure(lambda: codec.decode_batch(coors, offsets))
+
+
+def cases() -> Iterator[Tuple[str, Callable[[], Dict[str, float]]]]:
+    """
+    Enumerate the benchmark cases. Codecs and payloads are only built when a case is measured so
+    filtered runs pay for the selected cases alone.
+
+    :yield: case name and a callable measuring it
+    :rtype: Iterator[Tuple[str,Callable[[],Dict[str,float]]]]
+    """
+    for module in ("scodec", "scodec.codec.n2", "scodec.codec.n3"):
+        yield "import/{}".format(module), partial(measure_import, module)
+    for name, cls in CODECS.items():
+        for block_size in BLOCK_SIZES[name]:
+            # construction includes building the curve lookup tables
+            yield "{}/construct/block={}".format(name, block_size), \
+                lambda c=cls, b=block_size: measure(lambda: c(b).table)
+            for density in DENSITIES:
+                for stage in ("encode", "decode", "roundtrip"):
+                    yield "{}/{}/block={}/density={}".format(name, stage, block_size, density), \
+                        partial(measure_stream, name, block_size, density, stage)
+    for name in CODECS:
+        for batch_size in BATCH_SIZES:
+            for stage in ("encode_batch", "decode_batch"):
+                yield "{}/{}/block={}/density=0.5/batch={}".format(
+                    name, stage, BATCH_BLOCK_SIZE, batch_size), \
+                    partial(measure_batch, name, batch_size, stage)
+
+
+def run(select: str = "") -> dict:
+    """
+    Run every case whose name contains select.
+
+    :param select: case name filter, defaults to all cases
+    :type select: str, optional
+    :return: results with environment metadata
+    :rtype: dict
+    """
+    results = {}
+    for name, bench in cases():
+        if select in name:
+            results[name] = bench()
+            print("{:<60} {:>12.3f} us".format(name, results[name]["median"] * 1e6))
+    return {
+        "meta": {
+            "scodec": __version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Compare median times against a baseline.
+
+    :param results: current results
+    :type results: dict
+    :param baseline: baseline results
+    :type baseline: dict
+    :param threshold: tolerated fractional slowdown
+    :type threshold: float
+    :return: True if no common case regressed beyond the threshold
+    :rtype: bool
+    """
+    ok = True
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["median"] / baseline["results"][name]["median"]
+        regressed = ratio > 1 + threshold
+        ok &= not regressed
+        print("{:<60} {:>8.2f}x {}".format(name, ratio, "REGRESSED" if regressed else ""))
+    return ok
+
+
+def main(argv) -> None:
+    output: Optional[str] = None
+    baseline: Optional[str] = None
+    threshold = 0.1
+    select = ""
+    try:
+        opts, _ = getopt.getopt(argv, "o:c:t:k:", ["output=", "compare=", "threshold=", "select="])
+    except getopt.GetoptError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ("-o", "--output"):
+            output = arg
+        elif opt in ("-c", "--compare"):
+            baseline = arg
+        elif opt in ("-t", "--threshold"):
+            threshold = float(arg)
+        elif opt in ("-k", "--select"):
+            select = arg
+    results = run(select)
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+    if baseline is not None:
+        with open(baseline) as file:
+            if not compare(results, json.load(file), threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
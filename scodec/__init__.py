@@ -2,28 +2,60 @@
 Spatial Codec __init___
 ===================================
 
-Initialization for spatial codec
+Initialization for spatial codec. Importing the package performs no I/O and leaves the logging
+configuration of the host application untouched; the codecs are loaded on first access.
 
 Copyright © 2021 LEAP. All Rights Reserved.
 """
 
-import yaml
 from pathlib import Path
-import logging
-import logging.config
+import importlib
 
 from scodec.__version__ import __version__
 
 
-# cleanup all previous logs for new runtime environment
 CONFIG_PATH = Path(__file__).parent.joinpath("config/log.yaml")
 
-# check for existance of config.yaml
-if not CONFIG_PATH.exists(): raise FileNotFoundError
-
-# configure the logger
-with open(CONFIG_PATH) as file:
-    logging.config.dictConfig(yaml.full_load(file))
-
-_log = logging.getLogger(__name__)
-_log.info("scodec version: %s", __version__)
+# lazily loaded package attributes and their modules
+_LAZY = {
+    "N2": "scodec.codec.n2",
+    "N3": "scodec.codec.n3",
+    "ND": "scodec.codec.nd",
+    "SpatialCodec": "scodec.codec.base",
+    "ParallelCodec": "scodec.codec.parallel",
+    "create_codec": "scodec.codec.factory",
+    "get_codec": "scodec.codec.factory",
+}
+
+__all__ = ["__version__", "configure_logging", *_LAZY]
+
+
+def configure_logging(path: Path = CONFIG_PATH) -> None:
+    """
+    Configure logging from a yaml dict config. This is applied by the cli and is never called on
+    import.
+
+    :param path: path to the logging configuration, defaults to the packaged config/log.yaml
+    :type path: Path, optional
+    :raises FileNotFoundError: if the configuration does not exist
+    """
+    import yaml
+    import logging.config
+    # check for existance of config.yaml
+    if not Path(path).exists(): raise FileNotFoundError(path)
+    # configure the logger
+    with open(path) as file:
+        logging.config.dictConfig(yaml.full_load(file))
+    logging.getLogger(__name__).info("scodec version: %s", __version__)
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -1,9 +1,60 @@
 import sys
+import mmap
+import shutil
 import getopt
 import logging
+import tempfile
 
-from scodec.codec.n3 import N3
-from scodec.codec.n2 import N2
+from scodec import configure_logging
+from scodec.container import Reader, Writer
+from scodec.codec.base import SpatialCodec
+from scodec.codec.factory import create_codec
+
+
+# frames encoded or decoded per batch in file mode
+BATCH_SIZE = 1024
+
+
+def codec(dimension: int, block: int, trace: bool = False, orientation: int = 0) -> SpatialCodec:
+    sc = create_codec(dimension, block, trace)
+    sc.orientation = orientation
+    return sc
+
+
+def encode_file(sc: SpatialCodec, src: str, dst) -> None:
+    with open(src, "rb") as f:
+        # an empty file cannot be memory mapped
+        if not f.seek(0, 2):
+            return encode_payload(sc, b"", dst)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            encode_payload(sc, mm, dst)
+
+
+def encode_payload(sc: SpatialCodec, payload, dst) -> None:
+    # the container header is completed last so spool output that cannot seek (e.g. a pipe)
+    if not dst.seekable():
+        with tempfile.TemporaryFile() as spool:
+            encode_payload(sc, payload, spool)
+            spool.seek(0)
+            shutil.copyfileobj(spool, dst)
+        return
+    with Writer(dst, sc, len(payload)) as writer:
+        for rows in sc.split_batches(payload, BATCH_SIZE):
+            writer.write(*sc.encode_batch(rows))
+
+
+def decode_file(src: str, dst, trace: bool = False) -> None:
+    with open(src, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decode_payload(mm, dst, trace)
+
+
+def decode_payload(container, dst, trace: bool = False) -> None:
+    reader = Reader(container)
+    sc = codec(reader.dimension, reader.block_size, trace, reader.orientation)
+    rows = (sc.decode_batch(coors, offsets) for coors, offsets in reader.batches(BATCH_SIZE))
+    for piece in sc.join_batches(rows):
+        dst.write(piece)
 
 
 def main(argv) -> None:
@@ -13,10 +64,16 @@ def main(argv) -> None:
     block = 0
     input_stream = bytes("default", be)
     mpl = False
+    trace = False
+    input_path = None
+    output_path = None
+    decode = False
+    orientation = 0
     # parse opts
     try:
-        opts, _ = getopt.getopt(
-            argv, "n:b:d:v:", ["dimension=", "block=", "data=", "verbose="])
+        opts, _ = getopt.getopt(argv, "n:b:d:v:ti:o:r:", [
+            "dimension=", "block=", "data=", "verbose=", "trace", "input=", "output=", "decode",
+            "orientation="])
     except getopt.GetoptError:
         logging.exception("python -m sc -n 2 -b 32 -s test -v=")
         sys.exit(2)
@@ -29,25 +86,45 @@ def main(argv) -> None:
             mpl = True
         elif opt in ("-b, --block"):
             block = int(arg)
+        elif opt in ("-t", "--trace"):
+            trace = True
+        elif opt in ("-i", "--input"):
+            input_path = arg
+        elif opt in ("-o", "--output"):
+            output_path = arg
+        elif opt == "--decode":
+            decode = True
+        elif opt in ("-r", "--orientation"):
+            orientation = int(arg)
     logging.info("Input stream: %s", input_stream)
     logging.info("Byte Encoding: %s", be)
     logging.info("Block size: %s", block)
     logging.info("Encoding dimension: %s", dimension)
     logging.info("MPL Visualizer: %s", mpl)
-    # N2/N3 impl split
-    if dimension == 2:
-        n2_sc = N2(block)
-        encode_stream = n2_sc.stream_encode(input_stream, mpl=mpl)
-        bytestream = n2_sc.stream_decode(encode_stream, len(input_stream))
-    elif dimension == 3:
-        n3_sc = N3(block)
-        encode_stream = n3_sc.stream_encode(input_stream, mpl=mpl)
-        bytestream = n3_sc.stream_decode(encode_stream, len(input_stream))
-    else:
-        raise ValueError("Spatial codec is only defined for 2D and 3D space filling curves")
+    logging.info("Trace: %s", trace)
+    logging.info("Orientation: %s", orientation)
+    if trace: logging.getLogger("scodec").setLevel(logging.DEBUG)
+    # file mode streams the input through the codec in bounded memory
+    if input_path is not None:
+        logging.info("Input file: %s", input_path)
+        logging.info("Output file: %s", output_path)
+        logging.info("Decode: %s", decode)
+        dst = open(output_path, "wb") if output_path else sys.stdout.buffer
+        try:
+            if decode:
+                decode_file(input_path, dst, trace)
+            else:
+                encode_file(codec(dimension, block, trace, orientation), input_path, dst)
+        finally:
+            if output_path: dst.close()
+        return
+    sc = codec(dimension, block, trace, orientation)
+    encode_stream = sc.stream_encode(input_stream, mpl=mpl)
+    bytestream = sc.stream_decode(encode_stream, len(input_stream))
     print(bytestream.decode("utf-8"))
 
 
 if __name__ == "__main__":
+    configure_logging()
     logger = logging.getLogger(__name__)
     main(sys.argv[1:])
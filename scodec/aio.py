@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio Spatial Codec Pipeline
+==============================
+Updated: 2021-06
+
+Async iterator encode and decode stages for driving a spatial codec from an event loop. Blocks are
+encoded and decoded in an executor (the default thread pool unless specified) so the event loop
+is never blocked by the codec. Each stage holds at most maxsize frames (in flight or waiting to be
+re-sequenced); once full it stops pulling from its source which propagates backpressure upstream.
+
+Every encoded frame carries a sequence number. Frames may be transmitted and decoded out of order;
+the decode stage re-sequences completions and yields payload blocks in sequence order.
+
+```
+frames = aio.encode(codec, blocks)
+async for block in aio.decode(codec, transmit(frames)):
+    ...
+```
+
+Dependancies
+------------
+```
+import asyncio
+import numpy as np
+from functools import partial
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, NamedTuple, Optional, \\
+    Tuple, Union
+from scodec.codec.base import SpatialCodec
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import asyncio
+import numpy as np
+from functools import partial
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, NamedTuple, Optional, \
+    Tuple, Union
+from scodec.codec.base import SpatialCodec
+
+
+class Frame(NamedTuple):
+    seq: int  # sequence number of the frame
+    coors: np.ndarray  # encoded coordinates of shape (k, dimension)
+
+
+async def encode(
+    codec: SpatialCodec, blocks: Union[AsyncIterable[bytes], Iterable[bytes]],
+    executor: Optional[Executor] = None, maxsize: int = 16, start: int = 0
+) -> AsyncIterator[Frame]:
+    """
+    Encode stage. Blocks are numbered from start and encoded concurrently in the executor.
+
+    :param codec: spatial codec
+    :type codec: SpatialCodec
+    :param blocks: blocks of data for encoding (e.g. from `SpatialCodec.split`)
+    :type blocks: Union[AsyncIterable[bytes],Iterable[bytes]]
+    :param executor: executor running the codec, defaults to the event loop default executor
+    :type executor: Executor, optional
+    :param maxsize: maximum number of frames held by the stage, defaults to 16
+    :type maxsize: int, optional
+    :param start: sequence number of the first block, defaults to 0
+    :type start: int, optional
+    :yield: sequenced frames in sequence order
+    :rtype: AsyncIterator[Frame]
+    """
+    async def numbered() -> AsyncIterator[Tuple[int, bytes]]:
+        seq = start
+        async for block in _aiter(blocks):
+            yield seq, block
+            seq += 1
+
+    async for seq, coors in _sequence(numbered(), codec.encode_array, executor, maxsize, start):
+        yield Frame(seq, coors)
+
+
+async def decode(
+    codec: SpatialCodec, frames: Union[AsyncIterable[Frame], Iterable[Frame]],
+    executor: Optional[Executor] = None, maxsize: int = 16, start: int = 0,
+    byte_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Decode stage. Frames may arrive in any order provided no frame is more than maxsize frames
+    ahead of the next frame due; decoded blocks are yielded in sequence order.
+
+    :param codec: spatial codec
+    :type codec: SpatialCodec
+    :param frames: sequenced frames (from `encode`)
+    :type frames: Union[AsyncIterable[Frame],Iterable[Frame]]
+    :param executor: executor running the codec, defaults to the event loop default executor
+    :type executor: Executor, optional
+    :param maxsize: maximum number of frames held by the stage, defaults to 16
+    :type maxsize: int, optional
+    :param start: sequence number of the first frame, defaults to 0
+    :type start: int, optional
+    :param byte_size: number of bytes to decode per frame, defaults to the minimum number of bytes
+        spanning the block
+    :type byte_size: int, optional
+    :raises RuntimeError: if the frames are reordered beyond maxsize
+    :raises ValueError: if the frames end with a sequence number missing
+    :yield: decoded blocks in sequence order
+    :rtype: AsyncIterator[bytes]
+    """
+    async def numbered() -> AsyncIterator[Tuple[int, np.ndarray]]:
+        async for frame in _aiter(frames):
+            yield frame.seq, frame.coors
+
+    func = partial(codec.decode_array, byte_size=byte_size)
+    async for _, block in _sequence(numbered(), func, executor, maxsize, start):
+        yield block
+
+
+async def _aiter(source: Union[AsyncIterable, Iterable]) -> AsyncIterator:
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+class _End(NamedTuple):
+    count: int  # number of items produced by the source
+    error: Optional[BaseException] = None
+
+
+async def _sequence(
+    source: AsyncIterator[Tuple[int, Any]], func: Callable, executor: Optional[Executor],
+    maxsize: int, start: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Apply func to every item of source in the executor and yield results in sequence order. A slot
+    is held by each item from submission until its result is yielded.
+    """
+    if maxsize < 1:
+        raise ValueError("{} maxsize must be positive".format(__name__))
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(maxsize)
+    done: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        count = 0
+        try:
+            async for seq, item in source:
+                await slots.acquire()
+                future = loop.run_in_executor(executor, func, item)
+                future.add_done_callback(partial(lambda s, f: done.put_nowait((s, f)), seq))
+                count += 1
+        except Exception as exc:
+            done.put_nowait(_End(count, exc))
+        else:
+            done.put_nowait(_End(count))
+
+    producer = asyncio.ensure_future(produce())
+    pending = {}
+    expected, received, total = start, 0, None
+    try:
+        while total is None or expected - start < total:
+            if expected in pending:
+                future = pending.pop(expected)
+                slots.release()
+                expected += 1
+                yield expected - 1, future.result()
+                continue
+            if total is not None and received == total:
+                raise ValueError("{} frame {} is missing".format(__name__, expected))
+            if len(pending) >= maxsize:
+                raise RuntimeError("{} frame {} is more than {} frames late".format(
+                    __name__, expected, maxsize))
+            message = await done.get()
+            if isinstance(message, _End):
+                if message.error is not None:
+                    raise message.error
+                total = message.count
+                continue
+            seq, future = message
+            pending[seq] = future
+            received += 1
+    finally:
+        producer.cancel()
+        for future in pending.values():
+            future.cancel()
@@ -3,55 +3,1156 @@
 Spatial Codec™ ABC
 ==================
 
-Abstract base class implemented by n2 and n3 spatial codec algorithms
+Abstract base class implemented by n2, n3 and nd spatial codec algorithms
 
 Dependancies
 ------------
 ```
+import os
 import math
+import struct
+import hashlib
 import logging
-from typing import List, Tuple
+import itertools
+import tempfile
+import numpy as np
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, Iterator, List, Optional, \
+    Sequence, Tuple, Union
 from abc import ABC, abstractmethod
-from scodec.plt.visualizer import Visualizer
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import Executor
+from scodec.codec import varint
+from scodec.codec.profiler import Profiler
+from scodec.__version__ import __version__
 ```
 Copyright © 2021 LEAP. All Rights Reserved.
 """
 
+import os
 import math
+import struct
+import hashlib
 import logging
-from typing import List, Tuple
+import itertools
+import tempfile
+import numpy as np
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, Iterator, List, Optional, \
+    Sequence, Tuple, Union
 from abc import ABC, abstractmethod
-from scodec.plt.visualizer import Visualizer
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import Executor
+from scodec.codec import varint
+from scodec.codec.profiler import Profiler
+from scodec.__version__ import __version__
+
+if TYPE_CHECKING:
+    from scodec.plt.visualizer import Visualizer
+
+# any buffer protocol object (mmap and other buffers are accepted alike)
+Buffer = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+@lru_cache(maxsize=None)
+def orientation_axes(dimension: int, orientation: int) -> Tuple[Tuple[int, ...], int]:
+    """
+    Axis permutation and reflections of an orientation of the n-cube. Orientations enumerate the
+    d! * 2^d symmetries of the n-cube: orientation >> d is the lexicographic index of the axis
+    permutation and bit j of the orientation reflects axis j. Axis j of an oriented coordinate is
+    axis axes[j] of the curve coordinate. Orientation 0 is the identity.
+
+    :param dimension: dimension of the n-cube
+    :type dimension: int
+    :param orientation: orientation in the range [0, d! * 2^d)
+    :type orientation: int
+    :raises ValueError: if the orientation is out of range
+    :return: axis permutation and reflection mask
+    :rtype: Tuple[Tuple[int,...],int]
+    """
+    if not 0 <= orientation < math.factorial(dimension) << dimension:
+        raise ValueError("{} orientation {} out of range for dimension {}".format(
+            __name__, orientation, dimension))
+    permutations = itertools.permutations(range(dimension))
+    axes = next(itertools.islice(permutations, orientation >> dimension, None))
+    return axes, orientation & ((1 << dimension) - 1)
+
+
+def orientation_permutation(dimension: int, order: int, orientation: int) -> np.ndarray:
+    """
+    Raster position permutation of an orientation. Element p is the raster (C order) position of
+    the cell at raster position p once oriented. Only used to derive the tables of an orientation,
+    which codecs keep (see `SpatialCodec.orientation`), so permutations are not cached.
+
+    :param dimension: dimension of the n-cube
+    :type dimension: int
+    :param order: curve order
+    :type order: int
+    :param orientation: orientation (see `orientation_axes`)
+    :type orientation: int
+    :return: read only raster permutation of shape (side ** dimension,)
+    :rtype: np.ndarray
+    """
+    axes, flips = orientation_axes(dimension, orientation)
+    side = 1 << order
+    shape = (side,) * dimension
+    cells = np.indices(shape).reshape(dimension, -1)[list(axes)]
+    for j in range(dimension):
+        if flips >> j & 1:
+            cells[j] = side - 1 - cells[j]
+    permutation = np.ravel_multi_index(tuple(cells), shape)
+    permutation = permutation.astype(np.min_scalar_type(side ** dimension - 1))
+    permutation.setflags(write=False)
+    return permutation
 
 
 class SpatialCodec(ABC):
-    def __init__(self, block_size: int, base_block_size: int) -> None:
+
+    HEADER = struct.Struct(">Q")  # payload length prefixed to framed streams
+    TABLE_VERSION = 1  # bump when the curve tables change to invalidate cached tables
+    # lookup table cache directory, tables are built in memory if None
+    cache_dir: Optional[str] = os.environ.get("SCODEC_CACHE_DIR")
+    SPARSE, DENSE, COMPLEMENT = range(3)  # tagged frame representations (see `encode_frame`)
+
+    def __init__(self, block_size: int, base_block_size: int, trace: bool = False) -> None:
         self.log = logging.getLogger(__name__)
-        # compute codec resolution (next power of 2)
-        self.visualizer = Visualizer()
+        # detailed per block tracing is opt-in so the encode/decode paths never touch the logger
+        self.trace = trace
+        # per stage counters are likewise opt-in (see `profile`)
+        self.profiler: Optional[Profiler] = None
+        # the visualizer (and matplotlib) is only loaded once a render is requested
+        self._visualizer = None
         super().__init__()
+        self.dimension = (base_block_size.bit_length() - 1)
         # validate block size
-        if not math.log(block_size, base_block_size).is_integer():
+        if block_size < 1 or block_size & (block_size - 1) \
+                or (block_size.bit_length() - 1) % self.dimension:
             raise ValueError("{} block size must be a power of {}".format(
                 __name__, base_block_size))
         self.block_size = block_size
-        self._sv = [2**x for x in range(block_size)]
-        self.log.debug("s vector: %s", self._sv)
+        # curve order and side length of the n-cube spanned by the curve
+        self.order = (block_size.bit_length() - 1) // self.dimension
+        self.side = 1 << self.order
+        # lookup tables are built lazily on first access
+        self._curve = None
+        self._table = None
+        self._inverse = None
+        self._raster = None
+        # lookup tables of inactive orientations
+        self._orientation = 0
+        self._oriented = {}
 
-    @abstractmethod
-    def stream_encode(self, bytestream: bytes) -> None:
-        ...
+    @property
+    def visualizer(self) -> "Visualizer":
+        """
+        MPL visualizer used by `render`. Matplotlib is imported and the figure constructed on first
+        access so codecs which never render do not pay for a GUI backend.
 
-    @abstractmethod
-    def stream_decode(self, coor: List[Tuple], byte_size: int) -> bytes:
-        ...
+        :return: codec visualizer
+        :rtype: Visualizer
+        """
+        if self._visualizer is None:
+            from scodec.plt.visualizer import Visualizer
+            self._visualizer = Visualizer()
+        return self._visualizer
+
+    def __setattr__(self, name: str, value) -> None:
+        # the lazily constructed visualizer holds no codec state so frozen codecs can still render
+        if name != "_visualizer" and self.__dict__.get("_frozen", False):
+            raise AttributeError("{} frozen codec is immutable".format(__name__))
+        super().__setattr__(name, value)
+
+    def freeze(self) -> "SpatialCodec":
+        """
+        Build every lookup table of the current orientation and make the codec immutable. A
+        frozen codec is read only and may be shared between threads; it cannot be traced,
+        profiled or re-oriented but can still render.
+
+        :return: the frozen codec
+        :rtype: SpatialCodec
+        """
+        self.table, self.inverse, self.raster
+        # tables of other orientations are unreachable once frozen
+        self._oriented = {}
+        self._frozen = True
+        return self
+
+    @contextmanager
+    def profile(self, profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+        """
+        Record per stage counters of the codec within the context. The previous profiler (if
+        any) is restored on exit.
+
+        :param profiler: profiler to record into, defaults to a new profiler
+        :type profiler: Profiler, optional
+        :yield: attached profiler
+        :rtype: Iterator[Profiler]
+        """
+        previous = self.profiler
+        self.profiler = Profiler() if profiler is None else profiler
+        try:
+            yield self.profiler
+        finally:
+            self.profiler = previous
+
+    @property
+    def orientations(self) -> int:
+        """
+        Number of orientations of the curve (the d! * 2^d symmetries of the n-cube).
+
+        :return: number of orientations
+        :rtype: int
+        """
+        return math.factorial(self.dimension) << self.dimension
+
+    @property
+    def orientation(self) -> int:
+        """
+        Orientation of the curve (see `orientation_axes`). Every lookup table is oriented so
+        encoded coordinates are the curve coordinates with axes permuted and reflected. Switching
+        orientation swaps in the tables cached for that orientation; the tables of a new
+        orientation are derived from the curve through `orientation_permutation` on first access.
+
+        :return: curve orientation
+        :rtype: int
+        """
+        return self._orientation
+
+    @orientation.setter
+    def orientation(self, orientation: int) -> None:
+        if orientation == self._orientation:
+            return
+        orientation_axes(self.dimension, orientation)
+        self._oriented[self._orientation] = (self._table, self._inverse, self._raster)
+        self._table, self._inverse, self._raster = self._oriented.pop(orientation, (None,) * 3)
+        self._orientation = orientation
+
+    @property
+    def table(self) -> np.ndarray:
+        """
+        Index to coordinate lookup table of the curve. Row i holds the coordinate of bit index i.
+
+        :return: coordinate table of shape (block_size, dimension)
+        :rtype: np.ndarray
+        """
+        if self._table is None:
+            if self._curve is None:
+                self._curve = self.load_table("curve", lambda: self.curve(
+                    np.arange(self.block_size)).astype(self.min_dtype(self.side)))
+            self._table = self.load_table("table", self._orient_table) if self._orientation \
+                else self._curve
+        return self._table
+
+    def _orient_table(self) -> np.ndarray:
+        shape = (self.side,) * self.dimension
+        permutation = orientation_permutation(self.dimension, self.order, self._orientation)
+        raster = permutation[np.ravel_multi_index(tuple(self._curve.T), shape)]
+        return np.stack(np.unravel_index(raster, shape), axis=-1).astype(self._curve.dtype)
+
+    @property
+    def inverse(self) -> np.ndarray:
+        """
+        Coordinate to index lookup table of the curve. The inverse of `table` such that
+        inverse[table[i]] == i.
+
+        :return: index table of shape (side,) * dimension
+        :rtype: np.ndarray
+        """
+        if self._inverse is None:
+            def build() -> np.ndarray:
+                inverse = np.empty(
+                    (self.side,) * self.dimension, dtype=self.min_dtype(self.block_size))
+                inverse[tuple(self.table.T)] = np.arange(self.block_size)
+                return inverse
+            self._inverse = self.load_table("inverse", build)
+        return self._inverse
+
+    @property
+    def raster(self) -> np.ndarray:
+        """
+        Curve index to raster (C order grid) position lookup table. Gathering a flattened grid
+        through this table yields the bit vector of the grid.
+
+        :return: raster table of shape (block_size,)
+        :rtype: np.ndarray
+        """
+        if self._raster is None:
+            self._raster = self.load_table("raster", lambda: np.ravel_multi_index(
+                tuple(self.table.T), (self.side,) * self.dimension
+            ).astype(self.min_dtype(self.block_size)))
+        return self._raster
+
+    def load_table(self, name: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Load a lookup table from the table cache directory (see `cache_dir`), building and saving
+        it on a miss. Cached tables are memory mapped read only so every process using the cache
+        shares one copy through the page cache. Without a cache directory the table is built in
+        memory. Tables are keyed by the curve parameters and a hash of the package and table
+        versions so stale tables are never loaded.
+
+        :param name: table name
+        :type name: str
+        :param build: builds the table
+        :type build: Callable[[],np.ndarray]
+        :return: read only table
+        :rtype: np.ndarray
+        """
+        if self.cache_dir is None:
+            table = build()
+            table.setflags(write=False)
+            return table
+        version = hashlib.sha1("{}:{}:{}.{}".format(
+            __version__, self.TABLE_VERSION, type(self).__module__, type(self).__qualname__
+        ).encode()).hexdigest()[:12]
+        # the unoriented curve is shared by every orientation
+        orientation = "" if name == "curve" else "-o{}".format(self._orientation)
+        path = Path(self.cache_dir).joinpath("{}-d{}-b{}{}-{}-{}.npy".format(
+            type(self).__name__.lower(), self.dimension, self.block_size, orientation, name,
+            version))
+        try:
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            pass
+        table = build()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write a uniquely named partial file then rename so concurrent threads and processes
+            # never share or load a partial table
+            fd, partial = tempfile.mkstemp(suffix=".partial", prefix=path.name + ".",
+                                           dir=path.parent)
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    np.save(file, table)
+                os.replace(partial, path)
+            except OSError:
+                os.unlink(partial)
+                raise
+            return np.load(path, mmap_mode="r")
+        except OSError as exc:
+            self.log.warning("Failed to cache %s table at %s: %s", name, path, exc)
+            table.setflags(write=False)
+            return table
+
+    @staticmethod
+    def min_dtype(bound: int) -> np.dtype:
+        """
+        Smallest unsigned integer type able to hold every value in the range [0, bound)
+
+        :param bound: exclusive upper bound of the stored values
+        :type bound: int
+        :return: compact unsigned integer dtype
+        :rtype: np.dtype
+        """
+        return np.min_scalar_type(max(bound - 1, 0))
+
+    @staticmethod
+    def as_bytes(data: Buffer) -> np.ndarray:
+        """
+        View any buffer protocol object (bytes, bytearray, memoryview, mmap, np.ndarray, ...) as a
+        flat uint8 array without copying. Only non contiguous arrays are copied.
+
+        :param data: input buffer
+        :type data: Buffer
+        :return: uint8 array over the bytes of the buffer
+        :rtype: np.ndarray
+        """
+        if isinstance(data, np.ndarray):
+            return np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        return np.frombuffer(data, dtype=np.uint8)
+
+    @staticmethod
+    def as_output(out: Buffer, size: Optional[int] = None) -> np.ndarray:
+        """
+        View a caller provided output buffer as a flat uint8 array written in place.
+
+        :param out: writable C contiguous buffer (bytearray, memoryview, mmap, np.ndarray, ...)
+        :type out: Buffer
+        :param size: required size of the buffer in bytes, defaults to any size
+        :type size: int, optional
+        :raises ValueError: if the buffer is read only, not contiguous or not of the given size
+        :return: writable uint8 array over the bytes of the buffer
+        :rtype: np.ndarray
+        """
+        dst = np.frombuffer(out, dtype=np.uint8)
+        if not dst.flags.writeable:
+            raise ValueError("{} output buffer is read only".format(__name__))
+        if size is not None and dst.size != size:
+            raise ValueError("{} output buffer holds {} bytes, expected {}".format(
+                __name__, dst.size, size))
+        return dst
+
+    def unpack(self, bytestream: Buffer) -> np.ndarray:
+        """
+        Unpack a block of bytes into a bit vector where element i holds bit i of the big endian
+        word. Bits beyond the block size are discarded and missing bits are zero. The block is
+        read in place from any buffer (see `as_bytes`).
+
+        :param bytestream: block of data for encoding
+        :type bytestream: Buffer
+        :return: bit vector of block_size elements
+        :rtype: np.ndarray
+        """
+        # only the trailing bytes can carry bits within the block size
+        data = self.as_bytes(bytestream)[-((self.block_size + 7) >> 3):]
+        if not data.size:
+            # unpackbits does not zero the padding requested by count for an empty input
+            return np.zeros(self.block_size, dtype=np.uint8)
+        return np.unpackbits(data[::-1], count=self.block_size, bitorder="little")
+
+    def encode_array(self, bytestream: Buffer) -> np.ndarray:
+        """
+        Vectorized stream encode. Coordinates of all set bits are gathered from the curve table
+        in a single pass.
+
+        :param bytestream: block of data for encoding
+        :type bytestream: Buffer
+        :return: encoded coordinates of shape (k, dimension) ordered by bit index in the smallest
+            unsigned dtype spanning the curve side
+        :rtype: np.ndarray
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        bits = self.unpack(bytestream)
+        if profiler is not None:
+            start = profiler.lap("unpack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        coors = np.take(self.table, np.flatnonzero(bits), axis=0)
+        if profiler is not None: profiler.lap("curve", start, 1, len(coors))
+        if self.trace:
+            self.log.debug("bits: %s", bits)
+            self.log.debug("coordinates: %s", coors.tolist())
+        return coors
+
+    def pack(
+        self, bits: np.ndarray, byte_size: Optional[int] = None, out: Optional[Buffer] = None
+    ) -> Union[bytes, Buffer]:
+        """
+        Pack a bit vector where element i holds bit i into a big endian word. The inverse of
+        `unpack`.
+
+        :param bits: bit vector of block_size elements
+        :type bits: np.ndarray
+        :param byte_size: number of trailing bytes of the word to return (zero padded if larger
+            than the word), defaults to the size of out or else the minimum number of bytes
+            spanning the block
+        :type byte_size: int, optional
+        :param out: writable buffer of byte_size bytes to pack into (see `as_output`), defaults to
+            new bytes
+        :type out: Buffer, optional
+        :return: packed bytestream, or out if given
+        :rtype: Union[bytes,Buffer]
+        """
+        if out is not None:
+            dst = self.as_output(out, byte_size)
+            word = np.packbits(bits, bitorder="little")[::-1]
+            pad = max(dst.size - word.size, 0)
+            dst[:pad] = 0
+            dst[pad:] = word[word.size - (dst.size - pad):]
+            return out
+        word = np.packbits(bits, bitorder="little")[::-1].tobytes()
+        if byte_size is None:
+            return word
+        if byte_size > len(word):
+            return bytes(byte_size - len(word)) + word
+        return word[len(word) - byte_size:]
+
+    def decode_array(
+        self, coors: np.ndarray, byte_size: Optional[int] = None, out: Optional[Buffer] = None
+    ) -> Union[bytes, Buffer]:
+        """
+        Vectorized stream decode. Bit indices of all coordinates are looked up from the inverse
+        curve table in a single pass and scattered into a bit vector before packing.
+
+        :param coors: encoded coordinates of shape (k, dimension)
+        :type coors: np.ndarray
+        :param byte_size: number of bytes to decode, defaults to the size of out or else the
+            minimum number of bytes spanning the block
+        :type byte_size: int, optional
+        :param out: writable buffer to decode into (e.g. a slice of a ring buffer), defaults to
+            new bytes
+        :type out: Buffer, optional
+        :raises ValueError: if a coordinate lies outside the curve
+        :return: decoded bytestream, or out if given
+        :rtype: Union[bytes,Buffer]
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        coors = self.as_coordinates(coors)
+        bits = np.zeros(self.block_size, dtype=np.uint8)
+        bits[self.inverse[tuple(coors.T)]] = 1
+        if profiler is not None: start = profiler.lap("curve", start, 1, len(coors))
+        bytestream = self.pack(bits, byte_size, out)
+        if profiler is not None:
+            profiler.lap("pack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        if self.trace:
+            self.log.debug("bits: %s", bits)
+            self.log.debug("bytestream: %s", bytestream)
+        return bytestream
+
+    def encode_grid(
+        self, bytestream: Buffer, out: Optional[np.ndarray] = None, packed: bool = False
+    ) -> np.ndarray:
+        """
+        Encode a block of bytes as a dense occupancy grid. Every cell of the grid is gathered from
+        the bit vector through the inverse curve table in a single pass.
+
+        :param bytestream: block of data for encoding
+        :type bytestream: Buffer
+        :param out: preallocated grid to write into, defaults to a new grid
+        :type out: np.ndarray, optional
+        :param packed: pack the last axis of the grid into bits (big endian bit order), defaults
+            to False
+        :type packed: bool, optional
+        :return: bool grid of shape (side,) * dimension or packed uint8 grid of shape
+            (side,) * (dimension - 1) + (ceil(side / 8),)
+        :rtype: np.ndarray
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        bits = self.unpack(bytestream).view(np.bool_)
+        if profiler is not None:
+            start = profiler.lap("unpack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        if packed:
+            grid = np.packbits(bits[self.inverse], axis=-1)
+            if out is not None:
+                out[...] = grid
+                grid = out
+        else:
+            # indices are always within the block so clipping never alters them and avoids
+            # buffering
+            grid = np.take(bits, self.inverse, out=out, mode="clip")
+        if profiler is not None: profiler.lap("curve", start, 1, int(np.count_nonzero(bits)))
+        return grid
+
+    def decode_grid(
+        self, grid: np.ndarray, byte_size: Optional[int] = None, packed: bool = False,
+        out: Optional[Buffer] = None
+    ) -> Union[bytes, Buffer]:
+        """
+        Decode a dense occupancy grid produced by `encode_grid` into bytes. Every non zero cell is
+        scattered to its bit index through the inverse curve table in a single pass.
+
+        :param grid: occupancy grid of shape (side,) * dimension
+        :type grid: np.ndarray
+        :param byte_size: number of bytes to decode, defaults to the minimum number of bytes
+            spanning the block
+        :type byte_size: int, optional
+        :param packed: the last axis of the grid is packed into bits, defaults to False
+        :type packed: bool, optional
+        :param out: writable buffer to decode into (see `decode_array`), defaults to new bytes
+        :type out: Buffer, optional
+        :return: decoded bytestream, or out if given
+        :rtype: Union[bytes,Buffer]
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        if packed:
+            grid = np.unpackbits(grid, axis=-1, count=self.side)
+        bits = np.take(np.asarray(grid).reshape(-1) != 0, self.raster)
+        if profiler is not None:
+            start = profiler.lap("curve", start, 1, int(np.count_nonzero(bits)))
+        bytestream = self.pack(bits, byte_size, out)
+        if profiler is not None:
+            profiler.lap("pack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        return bytestream
+
+    def compress(self, bytestream: Buffer) -> bytes:
+        """
+        Encode a block of bytes as a compressed frame. Hilbert locality maps runs of set bits to
+        runs of adjacent cells so the sorted curve indices of the set bits are stored as spans;
+        each span is the varint gap from the end of the previous span followed by the varint
+        span length less one.
+
+        :param bytestream: block of data for encoding
+        :type bytestream: Buffer
+        :return: compressed frame
+        :rtype: bytes
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        bits = self.unpack(bytestream)
+        if profiler is not None:
+            start = profiler.lap("unpack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        edges = np.diff(bits.view(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        gaps = starts - np.concatenate(([0], ends[:-1]))
+        frame = varint.encode(np.stack((gaps, ends - starts - 1), axis=1)).tobytes()
+        if profiler is not None:
+            profiler.lap("pack", start, 1, int((ends - starts).sum()), len(frame))
+        return frame
+
+    def decompress(self, frame: bytes, grid: bool = False, packed: bool = False) -> np.ndarray:
+        """
+        Decode a compressed frame produced by `compress` into coordinates or an occupancy grid.
+
+        :param frame: compressed frame
+        :type frame: bytes
+        :param grid: return an occupancy grid (see `encode_grid`), defaults to False
+        :type grid: bool, optional
+        :param packed: pack the last axis of the grid into bits, defaults to False
+        :type packed: bool, optional
+        :return: coordinates of shape (k, dimension) ordered by bit index or an occupancy grid
+        :rtype: np.ndarray
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        index = self.span_index(frame)
+        if profiler is not None:
+            start = profiler.lap("unpack", start, 1, nbytes=memoryview(frame).nbytes)
+        if not grid:
+            decoded = np.take(self.table, index, axis=0)
+        else:
+            bits = np.zeros(self.block_size, dtype=np.bool_)
+            bits[index] = True
+            if packed:
+                decoded = np.packbits(bits[self.inverse], axis=-1)
+            else:
+                decoded = np.take(bits, self.inverse)
+        if profiler is not None: profiler.lap("curve", start, 1, len(index))
+        return decoded
+
+    def encode_frame(self, bytestream: Buffer) -> bytes:
+        """
+        Encode a block of bytes in the smallest of three representations selected from the
+        population count of the block, recorded by a leading tag byte:
+
+        - `SPARSE`: coordinates of the set bits
+        - `DENSE`: bit packed occupancy grid (see `encode_grid`)
+        - `COMPLEMENT`: coordinates of the unset bits
+
+        Coordinates are stored in the curve table dtype ordered by bit index.
+
+        :param bytestream: block of data for encoding
+        :type bytestream: Buffer
+        :return: tagged frame
+        :rtype: bytes
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        bits = self.unpack(bytestream)
+        if profiler is not None:
+            start = profiler.lap("unpack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        count = int(np.count_nonzero(bits))
+        coor_size = self.table.itemsize * self.dimension
+        dense_size = self.side ** (self.dimension - 1) * ((self.side + 7) >> 3)
+        sizes = {
+            self.SPARSE: count * coor_size,
+            self.DENSE: dense_size,
+            self.COMPLEMENT: (self.block_size - count) * coor_size
+        }
+        tag = min(sizes, key=sizes.get)
+        if tag == self.DENSE:
+            body = np.packbits(bits.view(np.bool_)[self.inverse], axis=-1)
+        else:
+            body = np.take(self.table, np.flatnonzero(bits != (tag == self.COMPLEMENT)), axis=0)
+            body = body.astype(self.table.dtype.newbyteorder("<"), copy=False)
+        if profiler is not None: profiler.lap("curve", start, 1, count)
+        if self.trace:
+            self.log.debug("popcount: %s frame tag: %s", count, tag)
+        return bytes((tag,)) + body.tobytes()
+
+    def decode_frame(
+        self, frame: Buffer, byte_size: Optional[int] = None, out: Optional[Buffer] = None
+    ) -> Union[bytes, Buffer]:
+        """
+        Decode a tagged frame produced by `encode_frame` whatever its representation.
+
+        :param frame: tagged frame
+        :type frame: Buffer
+        :param byte_size: number of bytes to decode, defaults to the size of out or else the
+            minimum number of bytes spanning the block
+        :type byte_size: int, optional
+        :param out: writable buffer to decode into (see `decode_array`), defaults to new bytes
+        :type out: Buffer, optional
+        :raises ValueError: if the tag is unknown, the frame size does not match its tag or a
+            coordinate lies outside the curve
+        :return: decoded bytestream, or out if given
+        :rtype: Union[bytes,Buffer]
+        """
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        data = self.as_bytes(frame)
+        if not data.size:
+            raise ValueError("{} empty frame".format(__name__))
+        tag, body = int(data[0]), data[1:]
+        # dense frames are recorded by decode_grid
+        if tag == self.DENSE:
+            shape = (self.side,) * (self.dimension - 1) + ((self.side + 7) >> 3,)
+            if body.size != np.prod(shape):
+                raise ValueError("{} dense frame size mismatch".format(__name__))
+            return self.decode_grid(body.reshape(shape), byte_size, packed=True, out=out)
+        if tag not in (self.SPARSE, self.COMPLEMENT):
+            raise ValueError("{} unknown frame tag: {}".format(__name__, tag))
+        if body.size % (self.table.itemsize * self.dimension):
+            raise ValueError("{} frame ends within a coordinate".format(__name__))
+        coors = body.view(self.table.dtype.newbyteorder("<")).reshape(-1, self.dimension)
+        if (coors >= self.side).any():
+            raise ValueError("{} frame coordinate outside the curve".format(__name__))
+        index = self.inverse[tuple(coors.T)]
+        bits = np.full(self.block_size, tag == self.COMPLEMENT, dtype=np.uint8)
+        bits[index] = tag != self.COMPLEMENT
+        if profiler is not None:
+            count = len(index) if tag == self.SPARSE else self.block_size - len(index)
+            start = profiler.lap("curve", start, 1, count)
+        bytestream = self.pack(bits, byte_size, out)
+        if profiler is not None:
+            profiler.lap("pack", start, 1, nbytes=memoryview(bytestream).nbytes)
+        return bytestream
+
+    def span_index(self, frame: bytes) -> np.ndarray:
+        """
+        Expand a compressed frame into the sorted curve indices of its set bits.
+
+        :param frame: compressed frame
+        :type frame: bytes
+        :raises ValueError: if the frame is malformed or spans beyond the block
+        :return: curve indices in the smallest unsigned dtype spanning the block
+        :rtype: np.ndarray
+        """
+        values = varint.decode(frame)
+        if len(values) & 1:
+            raise ValueError("{} compressed frame ends within a span".format(__name__))
+        # bound each value before the signed cast so large varints cannot wrap around
+        if len(values) and values.max() >= self.block_size:
+            raise ValueError("{} compressed frame spans beyond the block".format(__name__))
+        values = values.astype(np.int64)
+        gaps, lengths = values[0::2], values[1::2] + 1
+        ends = np.cumsum(gaps + lengths)
+        if len(ends) and ends[-1] > self.block_size:
+            raise ValueError("{} compressed frame spans beyond the block".format(__name__))
+        # shift the position of every bit within the concatenated spans to its span start
+        shift = ends - np.cumsum(lengths)
+        index = np.arange(int(lengths.sum())) + np.repeat(shift, lengths)
+        return index.astype(self.min_dtype(self.block_size))
+
+    def encode_batch(
+        self, payloads: Union[np.ndarray, Sequence[bytes]], grid: bool = False,
+        packed: bool = False, executor: Optional[Executor] = None, chunk_size: int = 256
+    ) -> Union[Tuple[np.ndarray, np.ndarray], np.ndarray]:
+        """
+        Encode many blocks in a single vectorized pass. Each row of payloads is one block (big
+        endian word) as accepted by `stream_encode`. The heavy lifting (bit unpacking and table
+        gathers) runs in numpy kernels which release the GIL, so chunks of the batch can be
+        encoded concurrently by a thread pool executor.
+
+        :param payloads: uint8 array of shape (n, block_bytes) or a sequence of n equal length
+            blocks
+        :type payloads: Union[np.ndarray, Sequence[bytes]]
+        :param grid: encode each block as an occupancy grid, defaults to False
+        :type grid: bool, optional
+        :param packed: pack the last axis of each grid into bits, defaults to False
+        :type packed: bool, optional
+        :param executor: executor to encode chunks of the batch concurrently, defaults to None
+        :type executor: Executor, optional
+        :param chunk_size: frames per executor task, defaults to 256
+        :type chunk_size: int, optional
+        :return: coordinates of shape (k, dimension) with frame offsets of shape (n + 1,) such that
+            frame f is coordinates[offsets[f]:offsets[f + 1]], or a stack of n grids
+        :rtype: Union[Tuple[np.ndarray,np.ndarray],np.ndarray]
+        """
+        payloads = self.as_batch(payloads)
+        if executor is not None and len(payloads) > chunk_size:
+            chunks = list(executor.map(
+                lambda start: self.encode_batch(payloads[start:start + chunk_size], grid, packed),
+                range(0, len(payloads), chunk_size)
+            ))
+            if grid:
+                return np.concatenate(chunks)
+            offsets = np.zeros(len(payloads) + 1, dtype=np.int64)
+            np.cumsum(np.concatenate([np.diff(o) for _, o in chunks]), out=offsets[1:])
+            return np.concatenate([c for c, _ in chunks]), offsets
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        bits = self.unpack_batch(payloads)
+        if profiler is not None:
+            start = profiler.lap("unpack", start, len(payloads), nbytes=payloads.size)
+        if grid:
+            grids = np.take(bits.view(np.bool_), self.inverse, axis=1)
+            if packed:
+                grids = np.packbits(grids, axis=-1)
+            if profiler is not None:
+                profiler.lap("curve", start, len(bits), int(np.count_nonzero(bits)))
+            return grids
+        # block sizes are powers of 2 so the bit index is the low bits of the flat index
+        index = np.flatnonzero(bits) & (self.block_size - 1)
+        offsets = np.zeros(len(bits) + 1, dtype=np.int64)
+        np.cumsum(np.count_nonzero(bits, axis=1), out=offsets[1:])
+        coors = np.take(self.table, index, axis=0)
+        if profiler is not None: profiler.lap("curve", start, len(bits), len(index))
+        return coors, offsets
+
+    def decode_batch(
+        self, frames: np.ndarray, offsets: Optional[np.ndarray] = None, packed: bool = False,
+        executor: Optional[Executor] = None, chunk_size: int = 256, out: Optional[Buffer] = None
+    ) -> np.ndarray:
+        """
+        Decode many frames produced by `encode_batch` in a single vectorized pass. As with
+        `encode_batch` chunks of the batch can be decoded concurrently by a thread pool executor.
+
+        :param frames: coordinates of shape (k, dimension) if offsets are given otherwise a stack
+            of n occupancy grids
+        :type frames: np.ndarray
+        :param offsets: frame offsets of shape (n + 1,) into the coordinates, defaults to None
+        :type offsets: np.ndarray, optional
+        :param packed: the last axis of each grid is packed into bits, defaults to False
+        :type packed: bool, optional
+        :param executor: executor to decode chunks of the batch concurrently, defaults to None
+        :type executor: Executor, optional
+        :param chunk_size: frames per executor task, defaults to 256
+        :type chunk_size: int, optional
+        :param out: writable buffer of n * block_bytes bytes to decode into (see `as_output`),
+            defaults to a new array
+        :type out: Buffer, optional
+        :raises ValueError: if a coordinate lies outside the curve
+        :return: decoded blocks as a uint8 array of shape (n, block_bytes), a view of out if given
+        :rtype: np.ndarray
+        """
+        if offsets is None:
+            frames = np.asarray(frames)
+        else:
+            offsets = np.asarray(offsets)
+            frames = self.as_coordinates(frames)
+        n = len(frames) if offsets is None else len(offsets) - 1
+        if out is not None:
+            out = self.as_output(out, n * ((self.block_size + 7) >> 3)).reshape(n, -1)
+        if executor is not None and n > chunk_size:
+            def task(start: int) -> np.ndarray:
+                rows = None if out is None else out[start:start + chunk_size]
+                if offsets is None:
+                    return self.decode_batch(
+                        frames[start:start + chunk_size], packed=packed, out=rows)
+                chunk = offsets[start:start + chunk_size + 1]
+                return self.decode_batch(frames[chunk[0]:chunk[-1]], chunk - chunk[0], out=rows)
+            chunks = list(executor.map(task, range(0, n, chunk_size)))
+            return np.concatenate(chunks) if out is None else out
+        profiler = self.profiler
+        if profiler is not None: start = perf_counter()
+        if offsets is None:
+            if packed:
+                frames = np.unpackbits(frames, axis=-1, count=self.side)
+            frames = frames.reshape(n, self.block_size)
+            bits = np.take(frames != 0, self.raster, axis=1)
+        else:
+            bits = np.zeros((n, self.block_size), dtype=np.uint8)
+            frame = np.repeat(np.arange(n), np.diff(offsets))
+            bits.reshape(-1)[frame * self.block_size + self.inverse[tuple(frames.T)]] = 1
+        if profiler is not None:
+            start = profiler.lap("curve", start, n, int(np.count_nonzero(bits)))
+        rows = np.packbits(bits, axis=1, bitorder="little")[:, ::-1]
+        if out is not None:
+            out[...] = rows
+            rows = out
+        if profiler is not None: profiler.lap("pack", start, n, nbytes=rows.size)
+        return rows
+
+    def as_batch(self, payloads: Union[np.ndarray, Sequence[bytes]]) -> np.ndarray:
+        """
+        View a batch of blocks as a 2D uint8 array. Arrays of any dtype are viewed in place.
+
+        :param payloads: array of shape (n, ...) or a sequence of n equal length buffers
+        :type payloads: Union[np.ndarray, Sequence[bytes]]
+        :return: uint8 array of shape (n, width)
+        :rtype: np.ndarray
+        """
+        if not len(payloads):
+            return np.zeros((0, (self.block_size + 7) >> 3), dtype=np.uint8)
+        if not isinstance(payloads, np.ndarray):
+            payloads = np.array([self.as_bytes(p) for p in payloads])
+        elif payloads.dtype != np.uint8:
+            payloads = self.as_bytes(payloads).reshape(len(payloads), -1)
+        return payloads.reshape(len(payloads), -1)
+
+    def as_coordinates(self, coors: Union[np.ndarray, Sequence[Tuple[int, ...]]]) -> np.ndarray:
+        """
+        View coordinates as an integer array of shape (k, dimension). Integer arrays (e.g. the
+        compact coordinates returned by the encoders) are used in place; sequences of tuples are
+        converted to the curve table dtype.
+
+        :param coors: coordinates of shape (k, dimension) or a sequence of k coordinate tuples
+        :type coors: Union[np.ndarray, Sequence[Tuple[int,...]]]
+        :raises ValueError: if a coordinate lies outside the curve
+        :return: integer array of shape (k, dimension)
+        :rtype: np.ndarray
+        """
+        coors = np.asarray(coors)
+        if coors.dtype.kind not in "ui":
+            coors = coors.astype(self.table.dtype)
+        coors = coors.reshape(-1, self.dimension)
+        # negative coordinates would silently wrap around through numpy indexing
+        if coors.size and (coors.max() >= self.side or coors.dtype.kind == "i" and coors.min() < 0):
+            raise ValueError("{} coordinate outside the curve".format(__name__))
+        return coors
+
+    @staticmethod
+    def as_tuples(coors: np.ndarray) -> List[Tuple[int, ...]]:
+        """
+        Convert compact coordinates to a list of python int tuples. Only the legacy stream API
+        pays for this conversion; the array paths return compact coordinates.
+
+        :param coors: coordinates of shape (k, dimension)
+        :type coors: np.ndarray
+        :return: coordinate tuples
+        :rtype: List[Tuple[int,...]]
+        """
+        return [tuple(c) for c in np.asarray(coors).tolist()]
+
+    def unpack_batch(self, payloads: Union[np.ndarray, Sequence[bytes]]) -> np.ndarray:
+        """
+        Unpack many blocks into a stack of bit vectors. Row wise equivalent of `unpack`.
+
+        :param payloads: uint8 array of shape (n, block_bytes) or a sequence of n equal length
+            blocks
+        :type payloads: Union[np.ndarray, Sequence[bytes]]
+        :return: bit vectors of shape (n, block_size)
+        :rtype: np.ndarray
+        """
+        data = self.as_batch(payloads)[:, -((self.block_size + 7) >> 3):]
+        if not data.shape[1]:
+            # unpackbits does not zero the padding requested by count for an empty input
+            return np.zeros((len(data), self.block_size), dtype=np.uint8)
+        return np.unpackbits(data[:, ::-1], axis=1, count=self.block_size, bitorder="little")
+
+    def frame_header(self, length: int) -> bytes:
+        """
+        Header carrying the payload length of a framed stream. The header is zero padded on the
+        left so it spans whole chunks without changing its value.
+
+        :param length: payload length in bytes
+        :type length: int
+        :raises ValueError: if the block size cannot hold a whole byte
+        :return: header spanning a whole number of block_size / 8 byte chunks
+        :rtype: bytes
+        """
+        block_bytes = self.block_size >> 3
+        if not block_bytes:
+            raise ValueError("{} framing requires a block size of at least 8 bits".format(__name__))
+        header = self.HEADER.pack(length)
+        return bytes(-len(header) % block_bytes) + header
+
+    def split(self, payload: Buffer) -> Generator[bytes, None, None]:
+        """
+        Lazily split a payload of any length into consecutive block sized chunks. The payload is
+        preceeded by header chunk(s) carrying its length in bytes so the final partial chunk can be
+        recovered exactly.
+
+        :param payload: data for framing
+        :type payload: Buffer
+        :raises ValueError: if the block size cannot hold a whole byte
+        :yield: header chunks followed by payload chunks of at most block_size / 8 bytes
+        :rtype: Generator[bytes, None, None]
+        """
+        block_bytes = self.block_size >> 3
+        view = memoryview(self.as_bytes(payload))
+        header = self.frame_header(len(view))
+        for offset in range(0, len(header), block_bytes):
+            yield header[offset:offset + block_bytes]
+        for offset in range(0, len(view), block_bytes):
+            yield view[offset:offset + block_bytes]
+
+    def frame_encode(self, payload: Buffer) -> Generator[np.ndarray, None, None]:
+        """
+        Lazily encode a payload of any length as consecutive block sized frames.
+
+        :param payload: data for encoding
+        :type payload: Buffer
+        :yield: encoded frames of shape (k, dimension) starting with the length header frame(s)
+        :rtype: Generator[np.ndarray, None, None]
+        """
+        for chunk in self.split(payload):
+            yield self.encode_array(chunk)
+
+    def frame_decode(self, frames: Iterable[np.ndarray]) -> bytes:
+        """
+        Decode a sequence of frames produced by `frame_encode` back into the original payload.
+
+        :param frames: encoded frames starting with the length header frame(s)
+        :type frames: Iterable[np.ndarray]
+        :raises ValueError: if the frames end within the header or before the payload length
+            given by the header
+        :return: decoded payload
+        :rtype: bytes
+        """
+        block_bytes = self.block_size >> 3
+        frames = iter(frames)
+        header = []
+        for _ in range(len(self.frame_header(0)) // block_bytes):
+            frame = next(frames, None)
+            if frame is None:
+                raise ValueError("{} frames truncated within the header".format(__name__))
+            header.append(self.decode_array(frame, block_bytes))
+        header = b"".join(header)
+        (remaining,) = self.HEADER.unpack(header[-self.HEADER.size:])
+        chunks = []
+        for frame in frames:
+            if not remaining: break
+            chunk = self.decode_array(frame, min(block_bytes, remaining))
+            remaining -= len(chunk)
+            chunks.append(chunk)
+        if remaining:
+            raise ValueError("{} frames truncated {} bytes short of the payload".format(
+                __name__, remaining))
+        return b"".join(chunks)
+
+    def split_batch(self, payload: Buffer) -> np.ndarray:
+        """
+        Split a payload of any length into a batch of block sized rows as accepted by
+        `encode_batch`. Row wise equivalent of `split`; the final partial chunk is right aligned.
+
+        :param payload: data for framing
+        :type payload: Buffer
+        :return: uint8 array of shape (n, block_size / 8) starting with the header row(s)
+        :rtype: np.ndarray
+        """
+        block_bytes = self.block_size >> 3
+        data = self.as_bytes(payload)
+        header = np.frombuffer(self.frame_header(len(data)), dtype=np.uint8)
+        full, partial = divmod(len(data), block_bytes)
+        h = len(header) // block_bytes
+        rows = np.zeros((h + full + bool(partial), block_bytes), dtype=np.uint8)
+        rows[:h] = header.reshape(h, block_bytes)
+        rows[h:h + full] = data[:full * block_bytes].reshape(full, block_bytes)
+        if partial:
+            rows[-1, block_bytes - partial:] = data[full * block_bytes:]
+        return rows
+
+    def join_batch(self, rows: np.ndarray) -> bytes:
+        """
+        Reassemble a payload from a batch of decoded rows produced by `decode_batch`. The inverse
+        of `split_batch`.
+
+        :param rows: uint8 array of shape (n, block_size / 8) starting with the header row(s)
+        :type rows: np.ndarray
+        :raises ValueError: if the rows end before the payload length given by the header
+        :return: decoded payload
+        :rtype: bytes
+        """
+        return b"".join(self.join_batches([rows]))
+
+    def split_batches(self, payload: Buffer, size: int) -> Generator[np.ndarray, None, None]:
+        """
+        Lazily split a payload of any length into batches of at most size block sized rows. The
+        concatenated batches equal `split_batch`. Batches of whole blocks are zero copy views of
+        the payload so a memory mapped payload is never read into memory at once.
+
+        :param payload: data for framing
+        :type payload: Buffer
+        :param size: maximum rows per batch
+        :type size: int
+        :yield: uint8 arrays of shape (k, block_size / 8) starting with the header row(s)
+        :rtype: Generator[np.ndarray, None, None]
+        """
+        block_bytes = self.block_size >> 3
+        data = self.as_bytes(payload)
+        header = np.frombuffer(self.frame_header(len(data)), dtype=np.uint8)
+        yield header.reshape(-1, block_bytes)
+        full, partial = divmod(len(data), block_bytes)
+        for start in range(0, full, size):
+            stop = min(start + size, full)
+            yield data[start * block_bytes:stop * block_bytes].reshape(-1, block_bytes)
+        if partial:
+            row = np.zeros((1, block_bytes), dtype=np.uint8)
+            row[0, block_bytes - partial:] = data[full * block_bytes:]
+            yield row
+
+    def join_batches(self, batches: Iterable[np.ndarray]) -> Generator[bytes, None, None]:
+        """
+        Lazily reassemble a payload from batches of decoded rows. The inverse of `split_batches`;
+        batches may be of any size.
+
+        :param batches: uint8 arrays of shape (k, block_size / 8) starting with the header row(s)
+        :type batches: Iterable[np.ndarray]
+        :raises ValueError: if the rows end before the payload length given by the header
+        :yield: consecutive pieces of the decoded payload
+        :rtype: Generator[bytes, None, None]
+        """
+        block_bytes = self.block_size >> 3
+        h = len(self.frame_header(0)) // block_bytes
+        header, remaining = b"", None
+        for rows in batches:
+            if remaining is None:
+                need = h - len(header) // block_bytes
+                header += rows[:need].tobytes()
+                rows = rows[need:]
+                if len(header) < h * block_bytes:
+                    continue
+                (remaining,) = self.HEADER.unpack(header[-self.HEADER.size:])
+            full = min(len(rows), remaining // block_bytes)
+            if full:
+                yield rows[:full].tobytes()
+                remaining -= full * block_bytes
+            if 0 < remaining < block_bytes and len(rows) > full:
+                yield rows[full, block_bytes - remaining:].tobytes()
+                remaining = 0
+            if not remaining:
+                return
+        if remaining is None:
+            raise ValueError("{} frames truncated within the header".format(__name__))
+        raise ValueError("{} frames truncated {} bytes short of the payload".format(
+            __name__, remaining))
+
+    def stream_encode(self, bytestream: Buffer, mpl: bool = False) -> List[Tuple[int, ...]]:
+        """
+        Encode a stream of bytes in the space of the codec.
+
+        :param bytestream: block of data for encoding
+        :type bytestream: Buffer
+        :param mpl: flag to enable mpl visualizer, defaults to False
+        :type mpl: bool, optional
+        :return: encoded stream of dimension length coordinate tuples
+        :rtype: List[Tuple[int,...]]
+        """
+        # bits beyond the block size are discarded by the bulk encoder
+        stream = self.as_tuples(self.encode_array(bytestream))
+        if mpl:
+            start = perf_counter()
+            self.render(stream)
+            if self.profiler is not None: self.profiler.lap("render", start, 1, len(stream))
+        return stream
+
+    def stream_decode(
+        self, stream: List[Tuple[int, ...]], byte_size: Optional[int] = None
+    ) -> bytes:
+        """
+        Decode a stream of coordinates encoded by `stream_encode` into bytes.
+
+        :param stream: stream of coordinate tuples
+        :type stream: List[Tuple[int,...]]
+        :param byte_size: number of bytes to decode, defaults to block_size
+        :type byte_size: int, optional
+        :return: decoded bytestream
+        :rtype: bytes
+        """
+        byte_size = self.block_size if byte_size is None else byte_size
+        return self.decode_array(stream, byte_size)
 
-    @abstractmethod
     def decode(self, coor: Tuple) -> int:
-        ...
+        """
+        Compute bit index from a coordinate tuple using the inverse lookup table.
+
+        :param coor: coordinate mapping
+        :type coor: Tuple
+        :return: bit index of coor
+        :rtype: int
+        """
+        return 0x1 << int(self.inverse[tuple(coor)])
+
+    def encode(self, i: int) -> Tuple:
+        """
+        Compute coordinate tuple at bit index i using the curve lookup table.
+
+        :param i: bit index
+        :type i: int
+        :return: coordinate tuple @ bit index i
+        :rtype: Tuple
+        """
+        return tuple(self.table[i].tolist())
 
     @abstractmethod
-    def encode(self, i: int):
+    def curve(self, index: np.ndarray) -> np.ndarray:
         ...
 
     @abstractmethod
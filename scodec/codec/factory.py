@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial Codec Factory
+=====================
+Updated: 2021-06
+
+Construct the spatial codec of a dimension (`N2`, `N3` or `ND`). `get_codec` returns shared
+frozen instances from a bounded LRU cache so long running services never rebuild or duplicate
+curve tables. Every orientation of a curve shares the unoriented curve table. Cache hits never
+lock; only concurrent builds of the same codec are serialised.
+
+Dependancies
+------------
+```
+import weakref
+import threading
+from typing import Dict, Tuple
+from functools import lru_cache
+from scodec.codec.base import SpatialCodec
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import weakref
+import threading
+from typing import Dict, Tuple
+from functools import lru_cache
+from scodec.codec.base import SpatialCodec
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+
+CACHE_SIZE = 32  # maximum number of shared codecs
+
+# per codec build locks so concurrent callers never build the same tables twice; _lock only
+# guards the map of build locks
+_lock = threading.Lock()
+_building: Dict[Tuple[int, int, int], threading.Lock] = {}
+# built codecs still in use, found by callers that missed the LRU cache while a build completed
+_live: "weakref.WeakValueDictionary[Tuple[int, int, int], SpatialCodec]" = \
+    weakref.WeakValueDictionary()
+
+
+def create_codec(dimension: int, block_size: int, trace: bool = False) -> SpatialCodec:
+    """
+    Construct a new codec of a dimension.
+
+    :param dimension: dimension of the curve
+    :type dimension: int
+    :param block_size: block size in bits
+    :type block_size: int
+    :param trace: flag to enable per block debug tracing, defaults to False
+    :type trace: bool, optional
+    :raises ValueError: if the dimension is less than 2
+    :return: spatial codec
+    :rtype: SpatialCodec
+    """
+    if dimension == 2:
+        return N2(block_size, trace=trace)
+    elif dimension == 3:
+        return N3(block_size, trace=trace)
+    elif dimension > 3:
+        return ND(block_size, dimension, trace=trace)
+    raise ValueError("Spatial codec is only defined for 2D and higher space filling curves")
+
+
+def get_codec(dimension: int, block_size: int, orientation: int = 0) -> SpatialCodec:
+    """
+    Shared codec of a dimension, block size and orientation. Instances are frozen (see
+    `SpatialCodec.freeze`) with every lookup table built, so they are safe to share between
+    threads. Use `create_codec` for a private codec that can be traced, profiled or re-oriented.
+
+    :param dimension: dimension of the curve
+    :type dimension: int
+    :param block_size: block size in bits
+    :type block_size: int
+    :param orientation: curve orientation, defaults to 0
+    :type orientation: int, optional
+    :raises ValueError: if the dimension, block size or orientation is invalid
+    :return: shared frozen codec
+    :rtype: SpatialCodec
+    """
+    return _cached(dimension, block_size, orientation)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached(dimension: int, block_size: int, orientation: int) -> SpatialCodec:
+    key = (dimension, block_size, orientation)
+    with _lock:
+        lock = _building.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            codec = _live.get(key)
+            if codec is None:
+                codec = create_codec(dimension, block_size)
+                if orientation:
+                    codec._curve = _cached(dimension, block_size, 0)._curve
+                    codec.orientation = orientation
+                _live[key] = codec = codec.freeze()
+            return codec
+    finally:
+        with _lock:
+            _building.pop(key, None)
+
+
+def _cache_clear() -> None:
+    _cached.cache_clear()
+    _live.clear()
+
+
+get_codec.cache_info = _cached.cache_info
+get_codec.cache_clear = _cache_clear
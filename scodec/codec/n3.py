@@ -9,102 +9,99 @@ Encode an n1 block of data in n3 space using a pseudo hilbert space filling curv
 Dependancies
 ------------
 ```
+import itertools
+import numpy as np
 from typing import List, Tuple
-from scodec.codec.base import SpatialCode
+from scodec.codec.base import SpatialCodec, orientation_axes
 ```
 Copyright © 2021 LEAP. All Rights Reserved.
 """
 
+import itertools
+import numpy as np
 from typing import List, Tuple
-from scodec.codec.base import SpatialCodec
+from scodec.codec.base import SpatialCodec, orientation_axes
+
+
+def state_tables(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate the state tables of an n dimensional hilbert curve. A state is the (entry, direction)
+    transform applied to the base iterator within a cell. Each cell of the base iterator is the
+    gray code of its index; the child cells are transformed with the entry and direction of their
+    parent as given by Hamilton (Compact Hilbert Indices, 2006). The initial state leaves the base
+    iterator unchanged so first order curves match `N3.iterator`.
+
+    :param n: dimension of the curve
+    :type n: int
+    :return: cell table (state, octant) -> cell bits and state table (state, octant) -> state
+    :rtype: Tuple[np.ndarray,np.ndarray]
+    """
+    mask = (1 << n) - 1
+
+    def rotl(b: int, r: int) -> int:
+        r %= n
+        return ((b << r) | (b >> (n - r))) & mask
+
+    def gray(w: int) -> int:
+        return w ^ (w >> 1)
+
+    def entry(w: int) -> int:
+        return gray((w - 1) & ~1) if w else 0
+
+    def direction(w: int) -> int:
+        # number of trailing set bits of the nearest odd index not above w
+        w = w if w & 1 else w - 1
+        return (((w ^ (w + 1)).bit_length() - 1) % n) if w > 0 else 0
+
+    states = [(0, n - 1)]
+    cells, transitions = [], []
+    # breadth first walk over all reachable states
+    for e, d in states:
+        cells.append([rotl(gray(w), d + 1) ^ e for w in range(1 << n)])
+        row = []
+        for w in range(1 << n):
+            state = (e ^ rotl(entry(w), d + 1), (d + direction(w) + 1) % n)
+            if state not in states:
+                states.append(state)
+            row.append(states.index(state))
+        transitions.append(row)
+    return np.array(cells, dtype=np.uint8), np.array(transitions, dtype=np.uint8)
 
 
 class N3(SpatialCodec):
 
     BASE_BLOCK_SIZE = 8   # block size of base iterator
+    CELLS, STATES = state_tables(3)  # hilbert curve state tables
 
-    def __init__(self, block_size: int):
-        # check if the block_size is greater than the base block size
-        if block_size > self.BASE_BLOCK_SIZE:
-            raise NotImplementedError(
-                "This version only supports first order\
-                (max 8 bit block_size) curves in 3D space"
-            )
-        super().__init__(block_size, self.BASE_BLOCK_SIZE)
+    def __init__(self, block_size: int, trace: bool = False):
+        super().__init__(block_size, self.BASE_BLOCK_SIZE, trace)
         self.log.info("Configured %s codec with block size: %s", __name__, self.block_size)
 
-    def stream_encode(self, bytestream: bytes, mpl: bool = False) -> List[Tuple[int, int, int]]:
+    def curve(self, index: np.ndarray) -> np.ndarray:
         """
-        Encode a stream of bytes in n3 space.
+        Compute coordinates of an n3 hilbert curve at every bit index in index. Each level of the
+        curve selects an octant from the next 3 bits of the index, resolves its cell by looking up
+        the current state in `CELLS` and moves to the state of that octant in `STATES`. This
+        costs O(order) table lookups per index evaluated over the whole index vector at once and
+        is used to generate the curve lookup table; use `encode` for table lookups.
 
-        :param bytestream: block of data for encoding
-        :type bytestream: bytes
-        :param mpl: flag to enable mpl visualizer, defaults to False
-        :type mpl: bool, optional
-        :return: encoded stream
-        :rtype: List[Tuple[int,int,int]]
-        """
-        # remove excess bytes if word exceeds an 8 bit number
-        bitstream = int(bytestream.hex(), base=16) & 0xFF
-        self.log.debug("bitstream: %s", bin(bitstream))
-        # unpacked bistream into iterable of single bits
-        bits = [bitstream >> i & 0x1 for i in range(self.block_size)]
-        # generate index by encoding each set bit sequentially
-        stream = list(filter(None, [self.encode(i) if b else None for i, b in enumerate(bits)]))
-        self.log.info("stream: %s", stream)
-        if mpl: self.render(stream)
-        return stream
-
-    def stream_decode(self, stream: List[Tuple[int, int, int]]) -> bytes:
-        """
-        Decode a stream of coordinates encoded in n3 space into bytes.
-
-        :param stream: stream of n3 space coordinate mapping
-        :type stream: List[Tuple[int, int, int]]
-        :return: decoded bytestream
-        :rtype: bytes
-        """
-        bitstream = 0x0
-        for coor in stream:
-            bitstream |= self.decode(coor)
-        self.log.info("decoded bitstream: %s", bin(bitstream))
-        bytestream = bitstream.to_bytes(self.block_size, byteorder="big", signed=False)
-        self.log.info("bytestream: %s", bytestream)
-        return bytestream
-
-    def decode(self, coor: Tuple[int, int, int]) -> int:
-        """
-        Compute bit index from a coordinate tuple encoded from an n3 first order hilbert curve.
-        This method simply computes the
-
-        :param coor: n3 space coordinate mapping
-        :type coor: Tuple[int, int, int]
-        :return: bit index of coordinate
-        :rtype: int
-        """
-        x, y, z = coor
-        x, y, z = 1 & x, 1 & y, 1 & z
-        d = (x << 2) ^ (x ^ y << 1) ^ (x ^ y ^ z)
-        index = 0x1 << d
-        self.log.debug("computed index: %s", bin(index))
-        return index
-
-    def encode(self, i: int) -> Tuple[int, int, int]:
-        """
-        Compute coordinate tuple of an n3 hilbert curve at index i. Normally this
-        applies iterative mapping to n3 space to constuct hilberts curve @ block_size
-        (the iterative solution is not supported therefore the encode function only
-        supports the base block_size: 8)
-
-        :param i: bit index
-        :type i: int
-        :return: coordinate tuple @ bit index i
-        :rtype: Tuple[int,int,int]
+        :param index: bit indices
+        :type index: np.ndarray
+        :return: coordinates of shape (k, 3) @ each bit index
+        :rtype: np.ndarray
         """
+        i = np.asarray(index, dtype=np.int64)
+        state = np.zeros_like(i)
         # initial coordinates
-        x, y, z = self.iterator(i)
-        self.log.info("resolved i:%s -> x:%s y:%s z:%s", i, x, y, z)
-        return x, y, z
+        x, y, z = np.zeros_like(i), np.zeros_like(i), np.zeros_like(i)
+        for level in reversed(range(self.order)):
+            w = (i >> (3 * level)) & 0x7  # octant selector at this level
+            cell = self.CELLS[state, w].astype(np.int64)
+            x |= (1 & (cell >> 2)) << level
+            y |= (1 & (cell >> 1)) << level
+            z |= (1 & cell) << level
+            state = self.STATES[state, w]
+        return np.stack((x, y, z), axis=-1)
 
     def iterator(self, i: int) -> Tuple[int, int, int]:
         """
@@ -132,140 +129,32 @@ class N3(SpatialCodec):
         :type r_y: int
         :param r_z: z component of iterator coordinate
         :type r_z: int
-        :param o: iterator variant selector
+        :param o: iterator variant selector e.g. ("x", "-z", "y")
         :type o: Tuple[str,str,str]
         :return: transformed coordinate tuple
         :rtype: Tuple[int,int,int]
         """
-        # iterator variant selector (-x and x are somehow the same?)
-        r_t = r_x, r_y, r_z
-        if o[0] == "x":
-            if o[1] == "y":
-                if o[2] == "z":
-                    r_t = r_x, r_y, r_z
-                else:
-                    r_t = r_x, r_y, 1 - r_z
-            elif o[1] == "-y":
-                if o[2] == "z":
-                    r_t = r_x, 1 - r_y, r_z
-                else:
-                    r_t = r_x, 1 - r_y, 1 - r_z
-            elif o[1] == "z":
-                if o[2] == "y":
-                    r_t = r_x, r_z, r_y
-                else:
-                    r_t = r_x, r_z, 1 - r_y
-            else:
-                if o[2] == "y":
-                    r_t = r_x, 1 - r_z, r_y
-                else:
-                    r_t = r_x, 1 - r_z, 1 - r_y
-        elif o[0] == "-x":
-            if o[1] == "y":
-                if o[2] == "z":
-                    r_t = 1 - r_x, r_y, r_z
-                else:
-                    r_t = 1 - r_x, r_y, 1 - r_z
-            elif o[1] == "-y":
-                if o[2] == "z":
-                    r_t = 1 - r_x, 1 - r_y, r_z
-                else:
-                    r_t = 1 - r_x, 1 - r_y, 1 - r_z
-            elif o[1] == "z":
-                if o[2] == "y":
-                    r_t = 1 - r_x, r_z, r_y
-                else:
-                    r_t = 1 - r_x, r_z, 1 - r_y
-            else:
-                if o[2] == "y":
-                    r_t = 1 - r_x, 1 - r_z, r_y
-                else:
-                    r_t = 1 - r_x, 1 - r_z, 1 - r_y
-        elif o[0] == "y":
-            if o[1] == "x":
-                if o[2] == "z":
-                    r_t = r_y, r_x, r_z
-                else:
-                    r_t = r_y, r_x, 1 - r_z
-            elif o[1] == "-x":
-                if o[2] == "z":
-                    r_t = r_y, 1 - r_x, r_z
-                else:
-                    r_t = r_y, 1 - r_x, 1 - r_z
-            elif o[1] == "z":
-                if o[2] == "x":
-                    r_t = r_y, r_z, r_x
-                else:
-                    r_t = r_y, r_z, 1 - r_x
-            else:
-                if o[2] == "x":
-                    r_t = r_y, 1 - r_z, r_x
-                else:
-                    r_t = r_y, 1 - r_z, 1 - r_x
-        elif o[0] == "-y":
-            if o[1] == "x":
-                if o[2] == "z":
-                    r_t = 1 - r_y, r_x, r_z
-                else:
-                    r_t = 1 - r_y, r_x, 1 - r_z
-            elif o[1] == "-x":
-                if o[2] == "z":
-                    r_t = 1 - r_y, 1 - r_x, r_z
-                else:
-                    r_t = 1 - r_y, 1 - r_x, 1 - r_z
-            elif o[1] == "z":
-                if o[2] == "x":
-                    r_t = 1 - r_y, r_z, r_x
-                else:
-                    r_t = 1 - r_y, r_z, 1 - r_x
-            else:
-                if o[2] == "x":
-                    r_t = 1 - r_y, 1 - r_z, r_x
-                else:
-                    r_t = 1 - r_y, 1 - r_z, 1 - r_x
-        elif o[0] == "z":
-            if o[1] == "x":
-                if o[2] == "y":
-                    r_t = r_z, r_x, r_y
-                else:
-                    r_t = r_z, r_x, 1 - r_y
-            elif o[1] == "-x":
-                if o[2] == "y":
-                    r_t = r_z, 1 - r_x, r_y
-                else:
-                    r_t = r_z, 1 - r_x, 1 - r_y
-            elif o[1] == "y":
-                if o[2] == "x":
-                    r_t = r_z, r_y, r_x
-                else:
-                    r_t = r_z, r_y, 1 - r_x
-            else:
-                if o[2] == "x":
-                    r_t = r_z, 1 - r_y, r_x
-                else:
-                    r_t = r_z, 1 - r_y, 1 - r_x
-        elif o[0] == "-z":
-            if o[1] == "x":
-                if o[2] == "y":
-                    r_t = 1 - r_z, r_x, r_y
-                else:
-                    r_t = 1 - r_z, r_x, 1 - r_y
-            elif o[1] == "-x":
-                if o[2] == "y":
-                    r_t = 1 - r_z, 1 - r_x, r_y
-                else:
-                    r_t = 1 - r_z, 1 - r_x, 1 - r_y
-            elif o[1] == "y":
-                if o[2] == "x":
-                    r_t = 1 - r_z, r_y, r_x
-                else:
-                    r_t = 1 - r_z, r_y, 1 - r_x
-            else:
-                if o[2] == "x":
-                    r_t = 1 - r_z, 1 - r_y, r_x
-                else:
-                    r_t = 1 - r_z, 1 - r_y, 1 - r_x
-        return r_t
+        axes, flips = orientation_axes(self.dimension, self.variant(o))
+        r = r_x, r_y, r_z
+        return tuple(1 - r[a] if flips >> j & 1 else r[a] for j, a in enumerate(axes))
+
+    @staticmethod
+    def variant(o: Tuple[str, str, str]) -> int:
+        """
+        Orientation (see `SpatialCodec.orientation`) of an iterator variant selector. Component j
+        of the selector names the (optionally reflected) axis mapped to axis j.
+
+        :param o: iterator variant selector e.g. ("x", "-z", "y")
+        :type o: Tuple[str,str,str]
+        :raises ValueError: if the selector is not a signed permutation of the axes
+        :return: orientation
+        :rtype: int
+        """
+        axes = tuple("xyz".find(c.lstrip("-")) for c in o)
+        if sorted(axes) != [0, 1, 2]:
+            raise ValueError("{} invalid iterator variant: {}".format(__name__, o))
+        flips = sum(1 << j for j, c in enumerate(o) if c.startswith("-"))
+        return list(itertools.permutations(range(3))).index(axes) << 3 | flips
 
     def render(self, stream: List[Tuple[int, int, int]]) -> None:
         """
@@ -274,7 +163,7 @@ class N3(SpatialCodec):
         :param stream: encoded stream
         :type stream: List[Tuple[int,int,int]]
         """
-        index = [self.encode(i) for i in range(self.block_size)]
+        index = self.as_tuples(self.table)
         self.log.debug("index: %s", index)
         self.log.debug("stream: %s", stream)
         self.visualizer.add_n3_curve(index, marker="", label="index", clr="k")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+ND Spatial Codec
+================
+Updated: 2021-06
+
+Encode an n1 block of data in nd space (d >= 2) using a pseudo hilbert space filling curve
+
+The curve is computed with the transposed index representation (Skilling, Programming the
+Hilbert Curve, 2004). The index is transposed into one word per axis, gray decoded and each level
+is resolved by an exchange or inversion of the low bits of the axis words. Every step is a whole
+word bit operation evaluated over the index vector so no dimension specific code is required.
+
+Dependancies
+------------
+```
+import numpy as np
+from typing import List, Tuple
+from scodec.codec.base import SpatialCodec
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import numpy as np
+from typing import List, Tuple
+from scodec.codec.base import SpatialCodec
+
+
+class ND(SpatialCodec):
+
+    def __init__(self, block_size: int, dimension: int, trace: bool = False):
+        if dimension < 2:
+            raise ValueError("{} dimension must be at least 2".format(__name__))
+        super().__init__(block_size, 1 << dimension, trace)
+        self.log.info(
+            "Configured %s codec with block size: %s and dimension: %s",
+            __name__, self.block_size, self.dimension
+        )
+
+    def curve(self, index: np.ndarray) -> np.ndarray:
+        """
+        Compute coordinates of an nd hilbert curve at every bit index in index. Each level costs
+        O(d) whole word bit operations evaluated over the whole index vector at once. This is used
+        to generate the curve lookup table; use `encode` for table lookups.
+
+        :param index: bit indices
+        :type index: np.ndarray
+        :return: coordinates of shape (k, d) @ each bit index
+        :rtype: np.ndarray
+        """
+        i = np.asarray(index, dtype=np.int64)
+        n = self.dimension
+        # transpose the index: bit b of axis j is bit (b * n + n - 1 - j) of the index
+        x = [np.zeros_like(i) for _ in range(n)]
+        for b in range(self.order):
+            for j in range(n):
+                x[j] |= (1 & (i >> (b * n + n - 1 - j))) << b
+        x = self.iterator(x)
+        # undo excess work from the lowest level up
+        q = 2
+        while q < self.side:
+            x = self.transform(x, q)
+            q <<= 1
+        return np.stack(x, axis=-1)
+
+    def transform(self, x: List[np.ndarray], q: int) -> List[np.ndarray]:
+        """
+        Transform the axis words at level bit q by inverting the low bits of the first axis or
+        exchanging them with those of another axis.
+
+        :param x: transposed axis words
+        :type x: List[np.ndarray]
+        :param q: level bit
+        :type q: int
+        :return: transformed axis words
+        :rtype: List[np.ndarray]
+        """
+        p = q - 1
+        for j in reversed(range(self.dimension)):
+            invert = (x[j] & q) != 0
+            t = np.where(invert, 0, (x[0] ^ x[j]) & p)
+            x[0] = x[0] ^ np.where(invert, p, t)
+            x[j] = x[j] ^ t
+        return x
+
+    def iterator(self, x: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Base iterator for ND algorithm. Gray decodes the transposed axis words so that for a first
+        order curve axis j holds bit (d - 1 - j) of the gray code of the index.
+
+        :param x: transposed axis words
+        :type x: List[np.ndarray]
+        :return: gray decoded axis words
+        :rtype: List[np.ndarray]
+        """
+        t = x[-1] >> 1
+        for j in reversed(range(1, self.dimension)):
+            x[j] = x[j] ^ x[j - 1]
+        x[0] = x[0] ^ t
+        return x
+
+    def render(self, stream: List[Tuple[int, ...]]) -> None:
+        """
+        Render MPL visualizer of index iterator and stream overlay
+
+        :param stream: encoded stream
+        :type stream: List[Tuple[int,...]]
+        :raises NotImplementedError: if the curve has more than 3 dimensions
+        """
+        if self.dimension > 3:
+            raise NotImplementedError("MPL visualizer only supports 2D and 3D curves")
+        index = self.as_tuples(self.table)
+        add_curve = self.visualizer.add_n2_curve if self.dimension == 2 \
+            else self.visualizer.add_n3_curve
+        add_curve(index, marker="", label="index", clr="k")
+        add_curve(stream, marker="o", label="stream", clr="r")
+        self.visualizer.show()
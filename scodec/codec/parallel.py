@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel Spatial Codec
+======================
+Updated: 2021-06
+
+Shard the frames of large multi-frame payloads across a process pool. Each worker is initialised
+once with a copy of the codec and its curve tables. Frames are exchanged through shared memory
+blocks that every worker reads from and writes its contiguous slice of the result into, so the
+output is assembled in order without pickling any frame data.
+
+Requires python 3.8+ (multiprocessing.shared_memory).
+
+Dependancies
+------------
+```
+import numpy as np
+from typing import Optional, Sequence, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from scodec.codec.base import Buffer, SpatialCodec
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import numpy as np
+from typing import Optional, Sequence, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from scodec.codec.base import Buffer, SpatialCodec
+
+# number of set bits of every byte value
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+# codec installed in each worker process by the pool initializer
+_codec: Optional[SpatialCodec] = None
+
+
+def _initialize(codec: SpatialCodec) -> None:
+    global _codec
+    _codec = codec
+
+
+def _attach(name: str, shape: Tuple[int, ...], dtype: np.dtype) -> Tuple[SharedMemory, np.ndarray]:
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _encode(src: tuple, dst: tuple, start: int, stop: int, offset: int, grid: bool,
+            packed: bool) -> None:
+    src_shm, payloads = _attach(*src)
+    dst_shm, out = _attach(*dst)
+    try:
+        result = _codec.encode_batch(payloads[start:stop], grid=grid, packed=packed)
+        if grid:
+            out[start:stop] = result
+        else:
+            coors, _ = result
+            out[offset:offset + len(coors)] = coors
+    finally:
+        del payloads, out
+        src_shm.close()
+        dst_shm.close()
+
+
+def _decode(src: tuple, dst: tuple, start: int, stop: int, offsets: Optional[np.ndarray],
+            packed: bool) -> None:
+    src_shm, frames = _attach(*src)
+    dst_shm, out = _attach(*dst)
+    try:
+        if offsets is None:
+            _codec.decode_batch(frames[start:stop], packed=packed, out=out[start:stop])
+        else:
+            _codec.decode_batch(
+                frames[offsets[0]:offsets[-1]], offsets - offsets[0], out=out[start:stop])
+    finally:
+        del frames, out
+        src_shm.close()
+        dst_shm.close()
+
+
+class ParallelCodec:
+    """
+    Process pool wrapper around a spatial codec (`N2`, `N3`, `ND`, ...). Batches are sharded into
+    chunks of chunk_size frames which are encoded or decoded concurrently by the workers.
+    """
+
+    def __init__(self, codec: SpatialCodec, workers: Optional[int] = None, chunk_size: int = 256):
+        if chunk_size < 1:
+            raise ValueError("{} chunk size must be positive".format(__name__))
+        self.codec = codec
+        self.chunk_size = chunk_size
+        # build the curve tables once so every worker receives them with the codec
+        codec.table, codec.inverse, codec.raster
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_initialize, initargs=(codec,))
+
+    def __enter__(self) -> "ParallelCodec":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the worker pool.
+        """
+        self.executor.shutdown()
+
+    def encode_batch(
+        self, payloads: Union[np.ndarray, Sequence[Buffer]], grid: bool = False,
+        packed: bool = False
+    ) -> Union[Tuple[np.ndarray, np.ndarray], np.ndarray]:
+        """
+        Parallel `SpatialCodec.encode_batch`.
+
+        :param payloads: array of shape (n, ...) or a sequence of n equal length buffers
+        :type payloads: Union[np.ndarray,Sequence[Buffer]]
+        :param grid: encode each block as an occupancy grid, defaults to False
+        :type grid: bool, optional
+        :param packed: pack the last axis of each grid into bits, defaults to False
+        :type packed: bool, optional
+        :return: coordinates of shape (k, dimension) with frame offsets of shape (n + 1,), or a
+            stack of n grids
+        :rtype: Union[Tuple[np.ndarray,np.ndarray],np.ndarray]
+        """
+        codec = self.codec
+        payloads = self.align(payloads)
+        n = len(payloads)
+        offsets = None
+        if grid:
+            shape = (n,) + (codec.side,) * codec.dimension
+            if packed:
+                shape = shape[:-1] + ((codec.side + 7) >> 3,)
+            dtype = np.dtype(np.uint8 if packed else np.bool_)
+        else:
+            # size the output exactly from the population count of each block
+            counts = POPCOUNT[payloads].sum(axis=1)
+            if codec.block_size & 0x7:
+                counts -= POPCOUNT[payloads[:, 0] >> (codec.block_size & 0x7)]
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            shape = (int(offsets[-1]), codec.dimension)
+            dtype = codec.table.dtype
+        with _Shared(payloads) as src, _Shared(shape=shape, dtype=dtype) as dst:
+            self.run(_encode, n, lambda start, stop: (
+                src.spec, dst.spec, start, stop,
+                0 if offsets is None else int(offsets[start]), grid, packed))
+            out = dst.array.copy()
+        return out if grid else (out, offsets)
+
+    def decode_batch(
+        self, frames: np.ndarray, offsets: Optional[np.ndarray] = None, packed: bool = False
+    ) -> np.ndarray:
+        """
+        Parallel `SpatialCodec.decode_batch`.
+
+        :param frames: coordinates of shape (k, dimension) if offsets are given otherwise a stack
+            of n occupancy grids
+        :type frames: np.ndarray
+        :param offsets: frame offsets of shape (n + 1,) into the coordinates, defaults to None
+        :type offsets: np.ndarray, optional
+        :param packed: the last axis of each grid is packed into bits, defaults to False
+        :type packed: bool, optional
+        :return: decoded blocks as a uint8 array of shape (n, block_bytes)
+        :rtype: np.ndarray
+        """
+        frames = np.ascontiguousarray(frames)
+        n = len(frames) if offsets is None else len(offsets) - 1
+        if offsets is not None:
+            offsets = np.asarray(offsets, dtype=np.int64)
+            frames = frames.reshape(-1, self.codec.dimension)
+        shape = (n, (self.codec.block_size + 7) >> 3)
+        with _Shared(frames) as src, _Shared(shape=shape, dtype=np.uint8) as dst:
+            self.run(_decode, n, lambda start, stop: (
+                src.spec, dst.spec, start, stop,
+                None if offsets is None else offsets[start:stop + 1], packed))
+            return dst.array.copy()
+
+    def encode(
+        self, payload: Buffer, grid: bool = False, packed: bool = False
+    ) -> Union[Tuple[np.ndarray, np.ndarray], np.ndarray]:
+        """
+        Split a payload of any length into frames (see `SpatialCodec.split_batch`) and encode them
+        in parallel.
+
+        :param payload: data for encoding
+        :type payload: Buffer
+        :param grid: encode each frame as an occupancy grid, defaults to False
+        :type grid: bool, optional
+        :param packed: pack the last axis of each grid into bits, defaults to False
+        :type packed: bool, optional
+        :return: encoded frames as returned by `encode_batch`
+        :rtype: Union[Tuple[np.ndarray,np.ndarray],np.ndarray]
+        """
+        return self.encode_batch(self.codec.split_batch(payload), grid=grid, packed=packed)
+
+    def decode(
+        self, frames: np.ndarray, offsets: Optional[np.ndarray] = None, packed: bool = False
+    ) -> bytes:
+        """
+        Decode frames produced by `encode` in parallel and reassemble the original payload.
+
+        :param frames: encoded frames as returned by `encode`
+        :type frames: np.ndarray
+        :param offsets: frame offsets into the coordinates, defaults to None
+        :type offsets: np.ndarray, optional
+        :param packed: the last axis of each grid is packed into bits, defaults to False
+        :type packed: bool, optional
+        :return: decoded payload
+        :rtype: bytes
+        """
+        return self.codec.join_batch(self.decode_batch(frames, offsets, packed=packed))
+
+    def align(self, payloads: Union[np.ndarray, Sequence[Buffer]]) -> np.ndarray:
+        """
+        Right align each block in exactly block_bytes columns (truncating or zero padding on the
+        left) so the population count of a row equals the number of encoded coordinates.
+
+        :param payloads: array of shape (n, ...) or a sequence of n equal length buffers (see
+            `SpatialCodec.as_batch`)
+        :type payloads: Union[np.ndarray,Sequence[Buffer]]
+        :return: uint8 array of shape (n, block_bytes)
+        :rtype: np.ndarray
+        """
+        payloads = self.codec.as_batch(payloads)
+        block_bytes = (self.codec.block_size + 7) >> 3
+        width = payloads.shape[1]
+        if width >= block_bytes:
+            return np.ascontiguousarray(payloads[:, width - block_bytes:])
+        aligned = np.zeros((len(payloads), block_bytes), dtype=np.uint8)
+        aligned[:, block_bytes - width:] = payloads
+        return aligned
+
+    def run(self, task, n: int, args) -> None:
+        """
+        Submit task over consecutive chunks of n frames and wait for completion.
+
+        :param task: worker function
+        :type task: Callable
+        :param n: number of frames
+        :type n: int
+        :param args: maps a (start, stop) frame range to the task arguments
+        :type args: Callable
+        """
+        futures = [
+            self.executor.submit(task, *args(start, min(start + self.chunk_size, n)))
+            for start in range(0, n, self.chunk_size)
+        ]
+        # surface the first worker exception
+        for future in wait(futures).done:
+            future.result()
+
+
+class _Shared:
+    """
+    Shared memory block owned (and unlinked) by the parent process.
+    """
+
+    def __init__(self, array: Optional[np.ndarray] = None, shape: Tuple[int, ...] = (),
+                 dtype: np.dtype = np.uint8):
+        if array is not None:
+            shape, dtype = array.shape, array.dtype
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        self.shm = SharedMemory(create=True, size=size)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf)
+        if array is not None:
+            self.array[...] = array
+        self.spec = (self.shm.name, shape, dtype)
+
+    def __enter__(self) -> "_Shared":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
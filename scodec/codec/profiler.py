@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial Codec Profiler
+======================
+Updated: 2021-06
+
+Opt-in per stage counters for the spatial codecs. A codec with a profiler attached (see
+`SpatialCodec.profile`) records the wall time, calls, frames, bits set and bytes processed of each
+stage:
+
+- unpack: bytes to bit vectors
+- curve: bit indices to coordinates (and back) through the curve lookup tables
+- pack: bit vectors to bytes
+- render: MPL visualizer
+
+Codecs without a profiler skip all instrumentation. Counters can be exported as a dict or in the
+Prometheus text exposition format.
+
+```
+with codec.profile() as profiler:
+    codec.encode_batch(payloads)
+print(profiler.prometheus())
+```
+
+Dependancies
+------------
+```
+import threading
+from time import perf_counter
+from typing import Dict
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import threading
+from time import perf_counter
+from typing import Dict
+
+# exported counters and their descriptions
+COUNTERS = {
+    "seconds": "Wall time spent in each codec stage",
+    "calls": "Number of calls of each codec stage",
+    "frames": "Number of frames processed by each codec stage",
+    "bits": "Number of set bits processed by each codec stage",
+    "bytes": "Number of payload bytes processed by each codec stage",
+}
+
+
+class Profiler:
+    """
+    Thread safe per stage counters.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # the lock cannot be pickled (e.g. with a codec sent to a process pool)
+        return {"stages": self.stages}
+
+    def __setstate__(self, state: dict) -> None:
+        self.stages = state["stages"]
+        self.lock = threading.Lock()
+
+    def lap(self, stage: str, start: float, frames: int = 0, bits: int = 0,
+            nbytes: int = 0) -> float:
+        """
+        Record a call of stage started at start (see `time.perf_counter`).
+
+        :param stage: stage name
+        :type stage: str
+        :param start: start time of the call
+        :type start: float
+        :param frames: frames processed, defaults to 0
+        :type frames: int, optional
+        :param bits: set bits processed, defaults to 0
+        :type bits: int, optional
+        :param nbytes: payload bytes processed, defaults to 0
+        :type nbytes: int, optional
+        :return: end time of the call, the start time of the next stage
+        :rtype: float
+        """
+        end = perf_counter()
+        with self.lock:
+            counters = self.stages.get(stage)
+            if counters is None:
+                counters = self.stages[stage] = dict.fromkeys(COUNTERS, 0)
+            counters["seconds"] += end - start
+            counters["calls"] += 1
+            counters["frames"] += frames
+            counters["bits"] += bits
+            counters["bytes"] += nbytes
+        return end
+
+    def reset(self) -> None:
+        """
+        Clear all counters.
+        """
+        with self.lock:
+            self.stages.clear()
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """
+        Snapshot of the counters.
+
+        :return: counters of each stage keyed by stage name
+        :rtype: Dict[str,Dict[str,float]]
+        """
+        with self.lock:
+            return {stage: dict(counters) for stage, counters in self.stages.items()}
+
+    def prometheus(self, prefix: str = "scodec") -> str:
+        """
+        Export the counters in the Prometheus text exposition format.
+
+        :param prefix: metric name prefix, defaults to "scodec"
+        :type prefix: str, optional
+        :return: exposition text
+        :rtype: str
+        """
+        stages = self.as_dict()
+        lines = []
+        for counter, description in COUNTERS.items():
+            name = "{}_stage_{}_total".format(prefix, counter)
+            lines.append("# HELP {} {}.".format(name, description))
+            lines.append("# TYPE {} counter".format(name))
+            for stage, counters in sorted(stages.items()):
+                lines.append('{}{{stage="{}"}} {}'.format(name, stage, counters[counter]))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized Varint
+=================
+Updated: 2021-06
+
+LEB128 style variable length encoding of unsigned integers. Each value is stored in groups of 7
+bits, least significant group first, with the high bit of every byte but the last set. Every
+value of an array is encoded or decoded in a fixed number of whole array passes.
+
+Dependancies
+------------
+```
+import numpy as np
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import numpy as np
+
+MAX_BYTES = 10  # ceil(64 / 7) groups span an unsigned 64 bit value
+
+
+def encode(values: np.ndarray) -> np.ndarray:
+    """
+    Encode unsigned integers as varints.
+
+    :param values: unsigned integers
+    :type values: np.ndarray
+    :return: uint8 array of the concatenated varints
+    :rtype: np.ndarray
+    """
+    values = np.asarray(values, dtype=np.uint64).reshape(-1)
+    # number of 7 bit groups spanning each value
+    size = np.ones(len(values), dtype=np.intp)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        size += rest != 0
+        rest >>= np.uint64(7)
+    starts = np.cumsum(size) - size
+    group = np.arange(int(size.sum())) - np.repeat(starts, size)
+    out = (np.repeat(values, size) >> (np.uint64(7) * group.astype(np.uint64))) & np.uint64(0x7f)
+    out = out.astype(np.uint8)
+    out[group < np.repeat(size - 1, size)] |= 0x80
+    return out
+
+
+def decode(data: bytes) -> np.ndarray:
+    """
+    Decode concatenated varints.
+
+    :param data: concatenated varints
+    :type data: bytes
+    :raises ValueError: if the last varint is truncated or a varint overflows 64 bits
+    :return: decoded unsigned integers
+    :rtype: np.ndarray
+    """
+    data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) \
+        else data.astype(np.uint8, copy=False).reshape(-1)
+    if not data.size:
+        return np.zeros(0, dtype=np.uint64)
+    if data[-1] & 0x80:
+        raise ValueError("{} truncated varint".format(__name__))
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    size = ends - starts + 1
+    # the last group of a maximal varint carries only the top bit of a 64 bit value
+    if (size > MAX_BYTES).any() or (data[ends[size == MAX_BYTES]] > 1).any():
+        raise ValueError("{} varint overflows 64 bits".format(__name__))
+    group = np.arange(len(data)) - np.repeat(starts, size)
+    groups = (data & 0x7f).astype(np.uint64) << (np.uint64(7) * group.astype(np.uint64))
+    return np.bitwise_or.reduceat(groups, starts)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial Codec Container
+=======================
+Updated: 2021-06
+
+Versioned binary container for encoded frames. A container holds a fixed size header describing
+the codec and the payload, the coordinates of every frame packed contiguously at the minimum
+unsigned integer width spanning the curve side (e.g. uint8 for a side of up to 256) and a frame
+offset index for random access. All fields are little endian.
+
+```
+header:      magic "SCDC" | version u8 | dimension u8 | coordinate itemsize u8 | padding u8
+             | orientation u64 | block size u64 | payload length u64 | frame count u64
+             | index position u64
+coordinates: uint[k, dimension]
+index:       u64[frame count + 1] such that frame f is coordinates[index[f]:index[f + 1]]
+```
+
+`Reader` is zero copy: the coordinates and the index are `np.frombuffer` views of any buffer
+(bytes, memoryview, mmap, ...) so a memory mapped container is never read into memory at once.
+
+Dependancies
+------------
+```
+import io
+import shutil
+import struct
+import tempfile
+import numpy as np
+from typing import BinaryIO, Iterator, Tuple
+from scodec.codec.base import SpatialCodec
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import io
+import shutil
+import struct
+import tempfile
+import numpy as np
+from typing import BinaryIO, Iterator, Tuple
+from scodec.codec.base import SpatialCodec
+
+MAGIC = b"SCDC"
+VERSION = 3
+HEADER = struct.Struct("<4sBBBxQQQQQ")
+INDEX = np.dtype("<u8")
+
+
+class Writer:
+    """
+    Stream batches of encoded frames (see `SpatialCodec.encode_batch`) into a container. The frame
+    index is spooled to a temporary file so memory use is bounded by a single batch. The file must
+    be seekable; the header is completed by `close`.
+    """
+
+    def __init__(self, file: BinaryIO, codec: SpatialCodec, length: int = 0):
+        self.file = file
+        self.codec = codec
+        self.length = length
+        self.orientation = codec.orientation
+        if not 0 <= self.orientation < 1 << 64:
+            raise ValueError("{} orientation {} does not fit the container header".format(
+                __name__, self.orientation))
+        self.dtype = codec.table.dtype.newbyteorder("<")
+        self.start = file.tell()
+        self.frames = 0
+        self.count = 0
+        self.index = tempfile.TemporaryFile()
+        self.index.write(np.zeros(1, dtype=INDEX).tobytes())
+        file.write(self.header(0))
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def header(self, position: int) -> bytes:
+        """
+        Pack the container header.
+
+        :param position: byte position of the frame index relative to the container start
+        :type position: int
+        :return: packed header
+        :rtype: bytes
+        """
+        return HEADER.pack(MAGIC, VERSION, self.codec.dimension, self.dtype.itemsize,
+                           self.orientation, self.codec.block_size, self.length, self.frames,
+                           position)
+
+    def write(self, coors: np.ndarray, offsets: np.ndarray) -> None:
+        """
+        Append a batch of frames.
+
+        :param coors: coordinates of shape (k, dimension)
+        :type coors: np.ndarray
+        :param offsets: frame offsets of shape (n + 1,) into the coordinates
+        :type offsets: np.ndarray
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        coors = coors[offsets[0]:offsets[-1]]
+        self.file.write(np.ascontiguousarray(coors, dtype=self.dtype).tobytes())
+        self.index.write((offsets[1:] - offsets[0] + self.count).astype(INDEX).tobytes())
+        self.frames += len(offsets) - 1
+        self.count += int(offsets[-1] - offsets[0])
+
+    def close(self) -> None:
+        """
+        Append the frame index and complete the header. The underlying file is left open.
+        """
+        if self.index.closed:
+            return
+        position = self.file.tell() - self.start
+        # align the index for direct views
+        pad = -position % INDEX.itemsize
+        self.file.write(bytes(pad))
+        position += pad
+        self.index.seek(0)
+        shutil.copyfileobj(self.index, self.file)
+        self.index.close()
+        end = self.file.tell()
+        self.file.seek(self.start)
+        self.file.write(self.header(position))
+        self.file.seek(end)
+
+
+class Reader:
+    """
+    Zero copy reader of a container held in any buffer. Frames are views of the buffer.
+    """
+
+    def __init__(self, buffer):
+        size = memoryview(buffer).nbytes
+        if size < HEADER.size:
+            raise ValueError("{} truncated container header".format(__name__))
+        (magic, version, self.dimension, itemsize, self.orientation, self.block_size,
+         self.length, frames, position) = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("{} not a spatial codec container".format(__name__))
+        if version != VERSION:
+            raise ValueError("{} unsupported container version: {}".format(__name__, version))
+        self.dtype = np.dtype("<u{}".format(itemsize))
+        if position + (frames + 1) * INDEX.itemsize > size:
+            raise ValueError("{} truncated container index".format(__name__))
+        self.offsets = np.frombuffer(buffer, dtype=INDEX, count=frames + 1, offset=position)
+        count = int(self.offsets[-1])
+        if HEADER.size + count * self.dimension * itemsize > position:
+            raise ValueError("{} truncated container coordinates".format(__name__))
+        self.coors = np.frombuffer(
+            buffer, dtype=self.dtype, count=count * self.dimension, offset=HEADER.size
+        ).reshape(-1, self.dimension)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, frame: int) -> np.ndarray:
+        """
+        Coordinates of a frame.
+
+        :param frame: frame number
+        :type frame: int
+        :return: coordinates of shape (k, dimension)
+        :rtype: np.ndarray
+        """
+        if frame < 0:
+            frame += len(self)
+        if not 0 <= frame < len(self):
+            raise IndexError("{} frame {} out of range".format(__name__, frame))
+        return self.coors[self.offsets[frame]:self.offsets[frame + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for frame in range(len(self)):
+            yield self[frame]
+
+    def batches(self, size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Iterate over the frames in batches (see `SpatialCodec.decode_batch`).
+
+        :param size: maximum frames per batch
+        :type size: int
+        :yield: coordinates of shape (k, dimension) and frame offsets of shape (n + 1,)
+        :rtype: Iterator[Tuple[np.ndarray,np.ndarray]]
+        """
+        for start in range(0, len(self), size):
+            offsets = self.offsets[start:start + size + 1].astype(np.int64)
+            yield self.coors[offsets[0]:offsets[-1]], offsets - offsets[0]
+
+
+def dumps(codec: SpatialCodec, coors: np.ndarray, offsets: np.ndarray, length: int = 0) -> bytes:
+    """
+    Serialise frames into a container.
+
+    :param codec: spatial codec that encoded the frames
+    :type codec: SpatialCodec
+    :param coors: coordinates of shape (k, dimension)
+    :type coors: np.ndarray
+    :param offsets: frame offsets of shape (n + 1,) into the coordinates
+    :type offsets: np.ndarray
+    :param length: payload length in bytes, defaults to 0
+    :type length: int, optional
+    :return: container
+    :rtype: bytes
+    """
+    file = io.BytesIO()
+    with Writer(file, codec, length) as writer:
+        writer.write(coors, offsets)
+    return file.getvalue()
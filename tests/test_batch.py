@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Batch Codec Tests
+=================
+Updated: 2021-06
+
+Round trip tests of the vectorized batch encode and decode paths.
+
+Dependancies
+------------
+```
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+from scodec.codec.parallel import ParallelCodec
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+from scodec.codec.parallel import ParallelCodec
+
+CODECS = (N2(1024), N3(512), ND(256, 4))
+
+
+def ids(codec):
+    return type(codec).__name__
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=ids)
+def test_round_trip(codec):
+    rows = np.random.default_rng(0).integers(
+        0, 256, (16, codec.block_size >> 3), dtype=np.uint8)
+    coors, offsets = codec.encode_batch(rows)
+    assert np.array_equal(codec.decode_batch(coors, offsets), rows)
+    assert np.array_equal(codec.decode_batch(codec.encode_batch(rows, grid=True)), rows)
+    grids = codec.encode_batch(rows, grid=True, packed=True)
+    assert np.array_equal(codec.decode_batch(grids, packed=True), rows)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=ids)
+@pytest.mark.parametrize("payloads", (np.zeros((0, 4), dtype=np.uint8), []), ids=("array", "list"))
+def test_empty_batch(codec, payloads):
+    block_bytes = codec.block_size >> 3
+    coors, offsets = codec.encode_batch(payloads)
+    assert coors.shape == (0, codec.dimension) and offsets.tolist() == [0]
+    assert codec.decode_batch(coors, offsets).shape == (0, block_bytes)
+    grids = codec.encode_batch(payloads, grid=True)
+    assert grids.shape == (0,) + (codec.side,) * codec.dimension
+    assert codec.decode_batch(grids).shape == (0, block_bytes)
+    grids = codec.encode_batch(payloads, grid=True, packed=True)
+    assert codec.decode_batch(grids, packed=True).shape == (0, block_bytes)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=ids)
+def test_executor_accepts_sequences(codec):
+    rows = np.random.default_rng(1).integers(
+        0, 256, (20, codec.block_size >> 3), dtype=np.uint8)
+    coors, offsets = codec.encode_batch(rows)
+    grids = codec.encode_batch(rows, grid=True)
+    with ThreadPoolExecutor(2) as executor:
+        decoded = codec.decode_batch(
+            coors.tolist(), offsets.tolist(), executor=executor, chunk_size=3)
+        assert np.array_equal(decoded, rows)
+        assert np.array_equal(
+            codec.decode_batch(list(grids), executor=executor, chunk_size=3), rows)
+
+
+def test_empty_parallel_batch():
+    codec = N2(1024)
+    with ParallelCodec(codec, workers=1) as parallel:
+        coors, offsets = parallel.encode_batch([])
+        assert coors.shape == (0, 2) and offsets.tolist() == [0]
+        assert parallel.decode_batch(coors, offsets).shape == (0, 128)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial Codec Tests
+===================
+Updated: 2021-06
+
+Tests of the single block encode and decode paths shared by every codec.
+
+Dependancies
+------------
+```
+import pytest
+import numpy as np
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import pytest
+import numpy as np
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+
+CODECS = (N2(1024), N3(512), ND(256, 4))
+
+
+def ids(codec):
+    return type(codec).__name__
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=ids)
+def test_coordinates_outside_curve(codec):
+    corner = [codec.side - 1] * codec.dimension
+    assert codec.decode_array(np.array([corner]))
+    for coors in (np.array([[-1] + corner[1:]]), np.array([[codec.side] + corner[1:]]),
+                  [tuple([-1] + corner[1:])]):
+        with pytest.raises(ValueError):
+            codec.decode_array(coors)
+        with pytest.raises(ValueError):
+            codec.stream_decode(coors)
+        with pytest.raises(ValueError):
+            codec.decode_batch(coors, [0, 1])
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=ids)
+def test_stream_round_trip(codec):
+    data = np.random.default_rng(0).integers(0, 256, codec.block_size >> 3, dtype=np.uint8)
+    stream = codec.stream_encode(memoryview(data))
+    assert all(isinstance(coor, tuple) and len(coor) == codec.dimension for coor in stream)
+    assert stream == [tuple(coor) for coor in codec.encode_array(data).tolist()]
+    assert codec.stream_decode(stream, len(data)) == data.tobytes()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Spatial Codec Container Tests
+=============================
+Updated: 2021-06
+
+Round trip tests of the versioned binary container.
+
+Dependancies
+------------
+```
+import io
+import pytest
+import numpy as np
+from scodec import container
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import io
+import pytest
+import numpy as np
+from scodec import container
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+
+
+def oriented(codec, orientation):
+    codec.orientation = orientation
+    return codec
+
+
+CODECS = (N2(1024), N3(4096), oriented(N3(512), 17), oriented(ND(256, 4), 300))
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda c: "{}-o{}".format(
+    type(c).__name__, c.orientation))
+def test_round_trip(codec):
+    data = np.random.default_rng(0).integers(0, 256, 1000, dtype=np.uint8).tobytes()
+    file = io.BytesIO()
+    with container.Writer(file, codec, len(data)) as writer:
+        for batch in codec.split_batches(data, 3):
+            writer.write(*codec.encode_batch(batch))
+    reader = container.Reader(file.getvalue())
+    assert (reader.dimension, reader.block_size, reader.orientation, reader.length) == (
+        codec.dimension, codec.block_size, codec.orientation, len(data))
+    assert reader.dtype.itemsize == codec.table.itemsize
+    decoded = (codec.decode_batch(coors, offsets) for coors, offsets in reader.batches(4))
+    assert b"".join(codec.join_batches(decoded)) == data
+    rows = codec.split_batch(data)
+    assert len(reader) == len(rows)
+    for f in (0, len(rows) - 1, -1):
+        assert codec.decode_array(reader[f], codec.block_size >> 3) == rows[f].tobytes()
+
+
+def test_dumps():
+    codec = N2(64)
+    rows = np.arange(32, dtype=np.uint8).reshape(4, 8)
+    coors, offsets = codec.encode_batch(rows)
+    reader = container.Reader(container.dumps(codec, coors, offsets, 32))
+    assert len(reader) == 4 and reader.length == 32
+    assert np.array_equal(reader.coors, coors)
+    assert np.array_equal(reader.offsets, offsets)
+    with pytest.raises(IndexError):
+        reader[4]
+
+
+def test_malformed():
+    codec = N2(64)
+    blob = container.dumps(codec, *codec.encode_batch(np.ones((2, 8), dtype=np.uint8)))
+    for bad in (b"", blob[:20], b"XXXX" + blob[4:], blob[:4] + b"\x09" + blob[5:], blob[:-1]):
+        with pytest.raises(ValueError):
+            container.Reader(bad)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Codec Factory Tests
+===================
+Updated: 2021-06
+
+Tests of the shared frozen codecs returned by `get_codec`.
+
+Dependancies
+------------
+```
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from scodec.codec.factory import get_codec
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from scodec.codec.factory import get_codec
+
+THREADS = 8
+
+
+@pytest.mark.parametrize("orientation", (0, 5))
+def test_concurrent_misses(orientation):
+    get_codec.cache_clear()
+    barrier = threading.Barrier(THREADS)
+
+    def miss(_):
+        barrier.wait()
+        return get_codec(3, 4096, orientation)
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        codecs = list(executor.map(miss, range(THREADS)))
+    assert all(codec is codecs[0] for codec in codecs)
+    assert get_codec(3, 4096, orientation) is codecs[0]
+
+
+def test_oriented_codecs_share_curve():
+    codec = get_codec(3, 512)
+    for orientation in (5, 17, 47):
+        oriented = get_codec(3, 512, orientation)
+        assert oriented is not codec and oriented.orientation == orientation
+        assert oriented._curve is codec._curve
+        assert (oriented.table != codec.table).any()
+
+
+def test_frozen():
+    codec = get_codec(2, 1024)
+    with pytest.raises(AttributeError):
+        with codec.profile():
+            pass
+    with pytest.raises(AttributeError):
+        codec.orientation = 3
+    with pytest.raises(AttributeError):
+        codec.trace = True
+    assert codec.profiler is None and codec.orientation == 0
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    assert codec.visualizer is codec.visualizer
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+N3 Spatial Codec Tests
+======================
+Updated: 2021-06
+
+Regression tests of the n3 hilbert curve state tables and lookup tables.
+
+Dependancies
+------------
+```
+import hashlib
+import pytest
+import numpy as np
+from scodec.codec.n3 import N3, state_tables
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import hashlib
+import pytest
+import numpy as np
+from scodec.codec.n3 import N3, state_tables
+
+BLOCK_SIZES = (8, 64, 512, 4096, 32768)
+# sha1 of the little endian N3(4096) curve table; stored frames depend on it
+TABLE_SHA1 = "872d086d87eae567c4671a0831a6c43d39b29d71"
+
+
+def test_state_tables():
+    cells, states = state_tables(3)
+    assert np.array_equal(cells, N3.CELLS) and np.array_equal(states, N3.STATES)
+    # 12 of the 24 (entry, direction) states are reachable from the initial state
+    assert cells.shape == states.shape == (12, 8)
+    for row in cells:
+        assert sorted(row) == list(range(8))
+    assert states.max() < len(states)
+
+
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+def test_table_is_permutation(block_size):
+    codec = N3(block_size)
+    table = codec.table.astype(np.int64)
+    assert table.shape == (block_size, 3)
+    assert len(np.unique(table, axis=0)) == block_size
+    assert table.min() == 0 and table.max() == codec.side - 1
+    assert np.array_equal(codec.inverse[tuple(table.T)], np.arange(block_size))
+
+
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+def test_table_is_continuous(block_size):
+    table = N3(block_size).table.astype(np.int64)
+    assert (np.abs(np.diff(table, axis=0)).sum(axis=1) == 1).all()
+
+
+def test_table_is_stable():
+    table = np.ascontiguousarray(N3(4096).table, dtype="<u2")
+    assert hashlib.sha1(table.tobytes()).hexdigest() == TABLE_SHA1
+
+
+def test_first_order_matches_iterator():
+    codec = N3(8)
+    assert codec.table.tolist() == [list(codec.iterator(i)) for i in range(8)]
+
+
+@pytest.mark.parametrize("orientation", (0, 1, 17, 47))
+def test_orientation_is_continuous(orientation):
+    codec = N3(512)
+    codec.orientation = orientation
+    table = codec.table.astype(np.int64)
+    assert len(np.unique(table, axis=0)) == 512
+    assert (np.abs(np.diff(table, axis=0)).sum(axis=1) == 1).all()
+    assert np.array_equal(codec.inverse[tuple(table.T)], np.arange(512))
+
+
+def test_transform_matches_orientation():
+    codec = N3(8)
+    o = ("y", "-z", "x")
+    codec.orientation = codec.variant(o)
+    assert codec.table.tolist() == [
+        list(codec.transform(*codec.iterator(i), o)) for i in range(8)]
+
+
+def test_round_trip():
+    codec = N3(4096)
+    data = np.random.default_rng(0).integers(0, 256, 512, dtype=np.uint8).tobytes()
+    assert codec.decode_array(codec.encode_array(data)) == data
+    assert codec.stream_decode(codec.stream_encode(data), 512) == data
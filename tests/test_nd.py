@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+ND Spatial Codec Tests
+======================
+Updated: 2021-06
+
+Regression tests of the nd hilbert curve lookup tables.
+
+Dependancies
+------------
+```
+import hashlib
+import pytest
+import numpy as np
+from scodec.codec.nd import ND
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import hashlib
+import pytest
+import numpy as np
+from scodec.codec.nd import ND
+
+# (dimension, side) pairs
+CURVES = ((3, 2), (3, 8), (4, 2), (4, 4), (4, 8), (5, 2), (5, 4), (6, 4))
+# sha1 of the little endian ND(4096, 4) curve table; stored frames depend on it
+TABLE_SHA1 = "a25114018a92956ce5913f7304dd0886f08aa97a"
+
+
+@pytest.mark.parametrize("dimension,side", CURVES)
+def test_table_is_permutation(dimension, side):
+    codec = ND(side ** dimension, dimension)
+    table = codec.table.astype(np.int64)
+    assert table.shape == (side ** dimension, dimension)
+    assert len(np.unique(table, axis=0)) == side ** dimension
+    assert table.min() == 0 and table.max() == side - 1
+    assert np.array_equal(codec.inverse[tuple(table.T)], np.arange(side ** dimension))
+
+
+@pytest.mark.parametrize("dimension,side", CURVES)
+def test_table_is_continuous(dimension, side):
+    table = ND(side ** dimension, dimension).table.astype(np.int64)
+    assert (np.abs(np.diff(table, axis=0)).sum(axis=1) == 1).all()
+
+
+def test_table_is_stable():
+    table = np.ascontiguousarray(ND(4096, 4).table, dtype="<u2")
+    assert hashlib.sha1(table.tobytes()).hexdigest() == TABLE_SHA1
+
+
+@pytest.mark.parametrize("dimension", (3, 4, 5, 6))
+def test_first_order_matches_iterator(dimension):
+    codec = ND(1 << dimension, dimension)
+    index = np.arange(1 << dimension)
+    # a first order index transposes to one bit per axis
+    words = [1 & (index >> (dimension - 1 - j)) for j in range(dimension)]
+    assert np.array_equal(codec.table, np.stack(codec.iterator(words), axis=-1))
+    # axis j holds bit (d - 1 - j) of the gray code of the index
+    gray = index ^ (index >> 1)
+    assert np.array_equal(
+        codec.table, np.stack([1 & (gray >> (dimension - 1 - j)) for j in range(dimension)], -1))
+
+
+@pytest.mark.parametrize("q", (2, 4))
+def test_transform_is_bijective(q):
+    codec = ND(4096, 4)
+    # every point of the cube
+    x = [np.arange(4096) >> (3 * j) & 7 for j in range(4)]
+    y = np.stack(codec.transform(x, q), axis=-1)
+    assert len(np.unique(y, axis=0)) == 4096 and y.max() < codec.side
+
+
+@pytest.mark.parametrize("orientation", (0, 5, 100, 383))
+def test_orientation_is_continuous(orientation):
+    codec = ND(256, 4)
+    codec.orientation = orientation
+    table = codec.table.astype(np.int64)
+    assert len(np.unique(table, axis=0)) == 256
+    assert (np.abs(np.diff(table, axis=0)).sum(axis=1) == 1).all()
+
+
+def test_round_trip():
+    codec = ND(4096, 4)
+    data = np.random.default_rng(0).integers(0, 256, 512, dtype=np.uint8).tobytes()
+    assert codec.decode_array(codec.encode_array(data)) == data
+    assert codec.stream_decode(codec.stream_encode(data), 512) == data
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Varint and Span Compression Tests
+=================================
+Updated: 2021-06
+
+Regression tests of the vectorized varint codec and the span compressed frames built on it.
+
+Dependancies
+------------
+```
+import pytest
+import numpy as np
+from scodec.codec import varint
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+```
+Copyright © 2021 LEAP. All Rights Reserved.
+"""
+
+import pytest
+import numpy as np
+from scodec.codec import varint
+from scodec.codec.n2 import N2
+from scodec.codec.n3 import N3
+from scodec.codec.nd import ND
+
+CODECS = (N2(1024), N3(4096), ND(256, 4))
+
+
+def test_varint_encoding():
+    assert varint.encode([0, 1, 127, 128, 300]).tobytes() == b"\x00\x01\x7f\x80\x01\xac\x02"
+    assert varint.encode([2 ** 64 - 1]).tobytes() == b"\xff" * 9 + b"\x01"
+    assert varint.encode([]).size == 0
+
+
+def test_varint_round_trip():
+    rng = np.random.default_rng(0)
+    values = np.concatenate((
+        np.array([0, 127, 128, 16383, 16384, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64),
+        rng.integers(0, 2 ** 63, 1000, dtype=np.uint64)
+        >> rng.integers(0, 63, 1000, dtype=np.uint64),
+    ))
+    data = varint.encode(values)
+    assert np.array_equal(varint.decode(data), values)
+    assert np.array_equal(varint.decode(data.tobytes()), values)
+    assert varint.decode(b"").size == 0
+
+
+def test_varint_truncated():
+    with pytest.raises(ValueError):
+        varint.decode(b"\x01\x80")
+
+
+def test_varint_overflow():
+    assert varint.decode(b"\xff" * 9 + b"\x01")[0] == 2 ** 64 - 1
+    for data in (b"\xff" * 9 + b"\x02", b"\xff" * 10 + b"\x01", b"\x80" * 12 + b"\x00"):
+        with pytest.raises(ValueError):
+            varint.decode(data)
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda c: type(c).__name__)
+@pytest.mark.parametrize("density", (0.0, 0.01, 0.5, 0.99, 1.0))
+def test_compress_round_trip(codec, density):
+    rng = np.random.default_rng(1)
+    bits = rng.random(codec.block_size) < density
+    data = codec.pack(bits.astype(np.uint8))
+    frame = codec.compress(data)
+    index = codec.span_index(frame)
+    assert np.array_equal(index, np.flatnonzero(bits))
+    assert np.array_equal(codec.decompress(frame), codec.encode_array(data))
+    assert np.array_equal(codec.decompress(frame, grid=True), codec.encode_grid(data))
+    assert np.array_equal(codec.decompress(frame, grid=True, packed=True),
+                          codec.encode_grid(data, packed=True))
+
+
+def test_compress_spans():
+    codec = N2(64)
+    bits = np.zeros(64, dtype=np.uint8)
+    bits[[3, 4, 5, 10, 63]] = 1
+    # (gap, length - 1) pairs: (3, 2), (4, 0), (52, 0)
+    assert codec.compress(codec.pack(bits)) == bytes((3, 2, 4, 0, 52, 0))
+
+
+def test_malformed_frames():
+    codec = N2(64)
+    with pytest.raises(ValueError):
+        codec.span_index(bytes((3, 2, 4)))
+    with pytest.raises(ValueError):
+        codec.span_index(bytes((60, 4)))
+    with pytest.raises(ValueError):
+        codec.decompress(b"\xff" * 12 + b"\x01\x00")
+    with pytest.raises(ValueError):
+        codec.decompress(b"\xff" * 9 + b"\x01\x00")